@@ -5,6 +5,7 @@ from aqt.gui_hooks import reviewer_did_answer_card, state_did_change, sync_did_f
 from aqt.qt import *
 from . import logic
 from . import layout
+from . import snapshot
 
 # Initialize UI
 layout.init_widgets()
@@ -15,6 +16,10 @@ reviewer_did_show_question.append(logic.on_show_question)
 state_did_change.append(logic.on_state_change)
 sync_did_finish.append(logic.on_sync_finished)
 
+# Write a pending session snapshot before the profile goes away
+if hasattr(aqt.gui_hooks, "profile_will_close"):
+    aqt.gui_hooks.profile_will_close.append(snapshot.flush)
+
 # --- BURY HOOKS ---
 # We always wrap the manually triggered methods (Menu/Shortcuts) because Anki's hook might not fire for them
 # or might fire too late. logic.on_bury handles double-counting.
@@ -232,8 +237,8 @@ if hasattr(aqt.gui_hooks, "state_did_undo"):
 elif hasattr(aqt.gui_hooks, "reviewer_did_undo"):
     aqt.gui_hooks.reviewer_did_undo.append(logic.on_undo)
 
-# Settings (Note: layout.update_all_widgets is passed as callback)
-mw.addonManager.setConfigUpdatedAction(__name__, layout.update_all_widgets)
+# Settings (Note: edits from Anki's config editor are normalised before they are applied)
+mw.addonManager.setConfigUpdatedAction(__name__, layout.on_config_edited)
 
 # Add menu item
 action = QAction("Progress Bar Settings", mw)
@@ -0,0 +1,35 @@
+from aqt import mw
+
+# Runs collection reads off the GUI thread.
+# Newer Anki: QueryOp (collection access is serialised with other ops).
+# Older Anki: mw.taskman.run_in_background.
+try:
+    from aqt.operations import QueryOp
+except ImportError:
+    QueryOp = None
+
+
+def run_in_background(op, on_success, on_failure=None):
+    """Calls op(col) on a worker thread, then on_success(result) on the main thread.
+
+    op must only read from the collection; all session/widget changes belong in on_success.
+    """
+    def failed(exc):
+        if on_failure:
+            on_failure(exc)
+
+    if QueryOp is not None:
+        query = QueryOp(parent=mw, op=op, success=on_success)
+        query.failure(failed)
+        query.run_in_background()
+        return
+
+    def on_done(future):
+        try:
+            result = future.result()
+        except Exception as exc:
+            failed(exc)
+            return
+        on_success(result)
+
+    mw.taskman.run_in_background(lambda: op(mw.col), on_done)
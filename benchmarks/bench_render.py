@@ -0,0 +1,267 @@
+"""Headless paint benchmark for ProgressBarWidget.
+
+Renders both bars into an offscreen QImage over synthetic sessions and reports
+per-frame latency percentiles and allocations. Needs PyQt6, not Anki: `aqt` is
+replaced by the stub in tests/anki_stub.py (aqt.qt re-exports PyQt6, aqt.mw
+serves config.json).
+
+    python benchmarks/bench_render.py                       # full matrix
+    python benchmarks/bench_render.py --quick               # smaller matrix
+    python benchmarks/bench_render.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_render.py --compare benchmarks/baseline.json
+
+Frames measured per scenario:
+    paint   full repaint of an unchanged bar (display list replay)
+    layout  full repaint after new data (display list rebuilt)
+    tick    live timer tick (partial repaint of the live cell)
+
+Baselines are machine specific; save one before a change and compare after it
+on the same machine. --compare exits with status 1 if any p50 got slower than
+--threshold.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+from anki_stub import PACKAGE, install_stubs # aqt stub shared with the tests
+
+REVIEW_COUNTS = (100, 1000, 10000)
+CHUNK_SIZES = (5, 10, 20, 50)
+WIDTH = 1200
+HEIGHT = 20
+
+
+# --- Scenarios ---
+
+# Option presets; each maps the default config to the variant measured
+def _plain(c):
+    for pos in ("top", "bottom"):
+        for key in ("numbers", "percentages", "bar_numbers", "bar_percentages"):
+            c["text_options"][pos][key]["enabled"] = False
+    c["visual_options"]["striped_again"] = False
+    c["visual_options"]["highlight_excess"] = False
+
+def _text(c):
+    for pos in ("top", "bottom"):
+        for key in ("numbers", "percentages", "bar_numbers", "bar_percentages"):
+            c["text_options"][pos][key]["enabled"] = True
+    c["visual_options"]["auto_hide_text"] = False
+
+def _timers(c):
+    for key in ("chunk_timer", "card_timer"):
+        c["timer"][key]["enabled"] = True
+        c["timer"][key]["live_enabled"] = True
+        c["timer"][key]["format"]["milliseconds"] = True
+
+def _patterns(c):
+    c["fail_policy"] = "acknowledge"
+    c["visual_options"]["striped_again"] = True
+    c["visual_options"]["highlight_excess"] = True
+
+def _all(c):
+    _text(c)
+    _timers(c)
+    _patterns(c)
+
+PRESETS = {
+    "plain": _plain,
+    "text": _text,
+    "timers": _timers,
+    "patterns": _patterns,
+    "all": _all,
+}
+
+
+def make_session(reviews, seed=0):
+    """Status/time logs of a session `reviews` cards in, with some fails re-queued."""
+    from importlib import import_module
+    state = import_module(PACKAGE + ".state")
+    r = random.Random(seed)
+    codes = (state.STATUS_AGAIN, state.STATUS_HARD, state.STATUS_GOOD, state.STATUS_GOOD,
+             state.STATUS_GOOD, state.STATUS_EASY, state.STATUS_UNDONE, state.STATUS_BURIED)
+    status_log = [r.choice(codes) for _ in range(reviews)]
+    time_log = [r.uniform(2, 40) for _ in range(reviews)]
+    initial_total = reviews + reviews // 3
+    fails = sum(1 for code in status_log if code == state.STATUS_AGAIN)
+    return status_log, time_log, initial_total + fails // 2, initial_total
+
+
+def scenarios(quick):
+    counts = REVIEW_COUNTS[:2] if quick else REVIEW_COUNTS
+    sizes = (5, 20) if quick else CHUNK_SIZES
+    presets = ("plain", "all") if quick else tuple(PRESETS)
+    for bar_type in ("chunks", "cards"):
+        for reviews in counts:
+            for chunk_size in sizes:
+                for preset in presets:
+                    yield bar_type, reviews, chunk_size, preset
+
+
+# --- Measuring ---
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(samples_ms):
+    values = sorted(samples_ms)
+    return {
+        "p50": round(percentile(values, 0.50), 4),
+        "p90": round(percentile(values, 0.90), 4),
+        "p99": round(percentile(values, 0.99), 4),
+        "max": round(values[-1], 4) if values else 0.0,
+    }
+
+
+def run_scenario(bar_type, reviews, chunk_size, preset, frames, alloc_frames):
+    from importlib import import_module
+    from PyQt6.QtCore import QPoint
+    from PyQt6.QtGui import QImage, QRegion
+    progressbar = import_module(PACKAGE + ".progressbar")
+    mw = sys.modules["aqt"].mw
+
+    config = mw.addonManager.getConfig(PACKAGE)
+    config["chunk_size"] = chunk_size
+    PRESETS[preset](config)
+    status_log, time_log, total, initial_total = make_session(reviews, seed=reviews + chunk_size)
+
+    widget = progressbar.ProgressBarWidget(bar_type)
+    widget.update_config(config)
+    widget.resize(WIDTH, HEIGHT)
+    start_time = time.time() - 5
+    widget.set_params(total, reviews, status_log, time_log, start_time, initial_total)
+    image = QImage(WIDTH, HEIGHT, QImage.Format.Format_ARGB32_Premultiplied)
+    widget.render(image) # Warm up fonts, caches and the display list
+
+    def paint():
+        widget.render(image)
+
+    def layout():
+        widget.relayout()
+        widget.render(image)
+
+    def tick():
+        rect = widget._live_rect
+        if rect is None or rect.isEmpty():
+            return False
+        widget.render(image, QPoint(rect.left(), rect.top()), QRegion(rect))
+        return True
+
+    result = {}
+    for name, frame in (("paint", paint), ("layout", layout), ("tick", tick)):
+        if name == "tick" and tick() is False:
+            continue # No live timer text on this bar
+        samples = []
+        for _ in range(frames):
+            t0 = time.perf_counter()
+            frame()
+            samples.append((time.perf_counter() - t0) * 1000)
+        stats = summarize(samples)
+
+        # Allocations per frame, measured separately (tracing slows everything down)
+        tracemalloc.start()
+        frame()
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(alloc_frames):
+            frame()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats["alloc_kb"] = round(max(0, peak - base) / 1024, 2)
+        stats["retained_kb"] = round((current - base) / 1024 / alloc_frames, 3)
+        result[name] = stats
+
+    widget.deleteLater()
+    return result
+
+
+def scenario_key(bar_type, reviews, chunk_size, preset):
+    return f"{bar_type}/{reviews}/cs{chunk_size}/{preset}"
+
+
+def compare(results, baseline, threshold):
+    """Prints p50 changes against baseline; returns the regressed keys."""
+    regressed = []
+    for key, frames in results.items():
+        for name, stats in frames.items():
+            old = baseline.get(key, {}).get(name)
+            if not old or not old["p50"]:
+                continue
+            ratio = stats["p50"] / old["p50"]
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "  REGRESSION"
+                regressed.append(f"{key}:{name}")
+            print(f"{key:32} {name:7} {old['p50']:9.3f} -> {stats['p50']:9.3f} ms  x{ratio:5.2f}{flag}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller scenario matrix")
+    parser.add_argument("--frames", type=int, default=30, help="timed frames per measurement")
+    parser.add_argument("--alloc-frames", type=int, default=5, help="traced frames per allocation measurement")
+    parser.add_argument("--filter", default="", help="only scenarios whose key contains this text")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare p50 latencies with a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p50 slowdown for --compare (0.25 = 25%%)")
+    parser.add_argument("--json", metavar="PATH", help="write results to PATH")
+    args = parser.parse_args(argv)
+
+    app = install_stubs()
+
+    results = {}
+    print(f"{'scenario':32} {'frame':7} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}  {'alloc kB':>9}")
+    for scenario in scenarios(args.quick):
+        key = scenario_key(*scenario)
+        if args.filter not in key:
+            continue
+        results[key] = run_scenario(*scenario, frames=args.frames, alloc_frames=args.alloc_frames)
+        for name, s in results[key].items():
+            print(f"{key:32} {name:7} {s['p50']:8.3f} {s['p90']:8.3f} {s['p99']:8.3f} {s['max']:8.3f}  {s['alloc_kb']:9.2f}")
+        app.processEvents()
+
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "width": WIDTH,
+            "height": HEIGHT,
+            "frames": args.frames,
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        print()
+        regressed = compare(results, baseline, args.threshold)
+        if regressed:
+            print(f"{len(regressed)} measurement(s) slower than baseline by more than {args.threshold:.0%}")
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
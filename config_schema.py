@@ -0,0 +1,195 @@
+import copy
+from collections.abc import Mapping
+from aqt import mw
+from .config_utils import freeze, get_defaults, thaw
+
+# Versioned layout of the user config.
+# Configs are normalised once when they are loaded or written: missing keys are
+# filled from config.json, unknown choices replaced by their default and older
+# layouts migrated. Everything past this module can index the config directly
+# instead of re-checking legacy forms on every paint and answer.
+#
+# Version history:
+#   0  unversioned: fail_policy may be "count" (now "acknowledge"),
+#      perfect_color may live in visual_options (now colors)
+#   1  current
+
+SCHEMA_VERSION = 1
+VERSION_KEY = "schema_version"
+
+# Allowed values of choice settings; anything else falls back to the default
+CHOICES = {
+    "fail_policy": ("ignore", "acknowledge"),
+    "bury_policy": ("ignore", "acknowledge"),
+    "suspend_policy": ("ignore", "acknowledge"),
+    "undo_policy": ("undo", "acknowledge"),
+}
+POSITIONS = ("top", "bottom", "hidden")
+STACK_ORDERS = ("chunk", "card")
+
+# Complete interval entry; missing fields used to be filled in by every reader
+INTERVAL_FIELDS = {
+    "enabled": True,
+    "start_bracket": "[",
+    "start_val": 0.0,
+    "end_bracket": ")",
+    "end_val": 1.0,
+    "color_key": "good",
+    "pattern_key": None,
+}
+
+
+def _migrate_0(config):
+    # "count" was the old name of "acknowledge"
+    if config.get("fail_policy") == "count":
+        config["fail_policy"] = "acknowledge"
+    # perfect_color moved from visual_options to colors
+    vis = config.get("visual_options")
+    if isinstance(vis, dict) and "perfect_color" in vis:
+        pc = vis.pop("perfect_color")
+        colors = config.setdefault("colors", {})
+        if isinstance(colors, dict) and pc and not colors.get("perfect_color"):
+            colors["perfect_color"] = pc
+
+# Version -> step migrating a config of that version to the next one
+MIGRATIONS = {
+    0: _migrate_0,
+}
+
+
+def _merge(value, default):
+    """value with missing/None entries filled from default (dicts merged per key)."""
+    if isinstance(default, dict):
+        if not isinstance(value, Mapping):
+            return copy.deepcopy(default)
+        merged = {k: _merge(value.get(k), v) for k, v in default.items()}
+        # Keep keys the defaults don't know (e.g. extra colors)
+        for k, v in value.items():
+            if k not in merged:
+                merged[k] = thaw(v)
+        return merged
+    if value is None:
+        return copy.deepcopy(default)
+    return thaw(value)
+
+
+def _number(value, default):
+    """float(value), or default if value is not a number (e.g. a typo in a hand-edited config)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _normalize_interval(iv):
+    if not isinstance(iv, Mapping):
+        iv = {}
+    out = {k: (iv[k] if iv.get(k) is not None else v) for k, v in INTERVAL_FIELDS.items()}
+    out["pattern_key"] = iv.get("pattern_key") # None is a valid value here
+    out["enabled"] = bool(out["enabled"])
+    out["start_val"] = _number(out["start_val"], INTERVAL_FIELDS["start_val"])
+    out["end_val"] = _number(out["end_val"], INTERVAL_FIELDS["end_val"])
+    if out["start_bracket"] not in ("[", "("):
+        out["start_bracket"] = "["
+    if out["end_bracket"] not in (")", "]"):
+        out["end_bracket"] = ")"
+    return out
+
+
+def config_version(config):
+    version = config.get(VERSION_KEY, 0)
+    return version if isinstance(version, int) else 0
+
+
+def normalize_config(config):
+    """Plain, migrated copy of a user config with every key of config.json present."""
+    defaults = thaw(get_defaults())
+    config = thaw(config) if isinstance(config, Mapping) else {}
+
+    version = config_version(config)
+    while version < SCHEMA_VERSION:
+        MIGRATIONS[version](config)
+        version += 1
+
+    config = _merge(config, defaults)
+
+    for key, allowed in CHOICES.items():
+        if config[key] not in allowed:
+            config[key] = defaults[key] if defaults.get(key) in allowed else allowed[0]
+    positions = config["positions"]
+    for key in ("chunks", "cards"):
+        if positions[key] not in POSITIONS:
+            positions[key] = defaults["positions"][key]
+    if positions["stack_order"] not in STACK_ORDERS:
+        positions["stack_order"] = defaults["positions"]["stack_order"]
+
+    try:
+        config["chunk_size"] = max(1, int(config["chunk_size"]))
+    except (TypeError, ValueError):
+        config["chunk_size"] = defaults["chunk_size"]
+    config["double_new"] = bool(config["double_new"])
+
+    ce = config["chunk_evaluation"]
+    def_weights = defaults["chunk_evaluation"]["weights"]
+    for key, value in ce["weights"].items():
+        ce["weights"][key] = _number(value, def_weights.get(key, 0.0))
+    # A user list of intervals replaces the default one as a whole
+    intervals = ce["intervals"] if isinstance(ce["intervals"], list) else []
+    ce["intervals"] = [_normalize_interval(iv) for iv in intervals]
+
+    config[VERSION_KEY] = SCHEMA_VERSION
+    return config
+
+
+class AddonConfig:
+    """Read-only view of a normalised config with the values event handlers need."""
+
+    def __init__(self, config):
+        self.data = freeze(config)
+        self.fail_policy = config["fail_policy"]
+        self.fail_ack = self.fail_policy == "acknowledge"
+        self.bury_policy = config["bury_policy"]
+        self.suspend_policy = config["suspend_policy"]
+        self.undo_policy = config["undo_policy"]
+        self.use_anki_cap = bool(config["timer"]["use_anki_cap"])
+        self.double_new = config["double_new"]
+        self.chunk_size = config["chunk_size"]
+        self.fsrs_use_deck = bool(config["fsrs_use_deck"])
+
+    def policy(self, key):
+        """Value of a *_policy key, e.g. policy("bury_policy")."""
+        return getattr(self, key)
+
+
+# Process-wide config, replaced only when the config is loaded or written,
+# so hooks don't go through the add-on manager on every event
+_current = None
+
+def current_config():
+    """Shared AddonConfig of the saved config (loaded on first use)."""
+    if _current is None:
+        load_config()
+    return _current
+
+
+def _set_current(config):
+    global _current
+    _current = AddonConfig(config)
+
+
+def load_config():
+    """Normalised user config; an older stored config is migrated and written back once."""
+    raw = mw.addonManager.getConfig(__name__)
+    config = normalize_config(raw)
+    if raw is None or config_version(raw) != SCHEMA_VERSION:
+        mw.addonManager.writeConfig(__name__, config)
+    _set_current(config)
+    return config
+
+
+def write_config(config):
+    """Normalises and saves config; returns the normalised copy."""
+    config = normalize_config(config)
+    mw.addonManager.writeConfig(__name__, config)
+    _set_current(config)
+    return config
@@ -1,23 +1,56 @@
 import json
 import os
+from collections.abc import Mapping, Sequence
+from types import MappingProxyType
+
+# Defaults from config.json, parsed once and shared read-only by every module.
+# get_defaults() re-reads the file only when its mtime/size changed (add-on update).
+
+_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.json")
+
+_defaults = None
+_defaults_key = None # (mtime_ns, size) of the parsed file
+
+def freeze(value):
+    """Read-only copy of a JSON value: dicts become mappingproxies, lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+def thaw(value):
+    """Plain, mutable dict/list copy of a (frozen) JSON value, e.g. for editing or writeConfig."""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
 
 def _load_defaults():
-    addon_dir = os.path.dirname(__file__)
-    config_path = os.path.join(addon_dir, "config.json")
-    if not os.path.exists(config_path):
+    if not os.path.exists(_CONFIG_PATH):
         return {}
     try:
-        with open(config_path, "r", encoding="utf-8") as f:
+        with open(_CONFIG_PATH, "r", encoding="utf-8") as f:
             return json.load(f)
     except Exception:
         return {}
 
-DEFAULT_CONFIG = _load_defaults()
+def get_defaults():
+    """Shared read-only defaults; config.json is only re-parsed after it changed on disk."""
+    global _defaults, _defaults_key
+    try:
+        st = os.stat(_CONFIG_PATH)
+        key = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = None
+    if _defaults is None or key != _defaults_key:
+        _defaults = freeze(_load_defaults())
+        _defaults_key = key
+    return _defaults
 
-def reload_defaults():
-    global DEFAULT_CONFIG
-    DEFAULT_CONFIG = _load_defaults()
-    return DEFAULT_CONFIG
+def _is_sequence(value):
+    return isinstance(value, Sequence) and not isinstance(value, (str, bytes))
 
 def get_config_val(config, default_config, *keys):
     """
@@ -29,9 +62,9 @@ def get_config_val(config, default_config, *keys):
     
     for key in keys:
         # Traverse config
-        if isinstance(curr_conf, dict):
+        if isinstance(curr_conf, Mapping):
             curr_conf = curr_conf.get(key)
-        elif isinstance(curr_conf, list) and isinstance(key, int):
+        elif _is_sequence(curr_conf) and isinstance(key, int):
             try:
                 curr_conf = curr_conf[key]
             except IndexError:
@@ -40,9 +73,9 @@ def get_config_val(config, default_config, *keys):
             curr_conf = None
             
         # Traverse default_config
-        if isinstance(curr_def, dict):
+        if isinstance(curr_def, Mapping):
             curr_def = curr_def.get(key)
-        elif isinstance(curr_def, list) and isinstance(key, int):
+        elif _is_sequence(curr_def) and isinstance(key, int):
             try:
                 curr_def = curr_def[key]
             except IndexError:
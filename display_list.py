@@ -0,0 +1,745 @@
+import math
+from .state import (
+    span_time,
+    STATUS_AGAIN, STATUS_HARD, STATUS_GOOD, STATUS_EASY,
+    STATUS_UNDONE, STATUS_BURIED, STATUS_SUSPENDED,
+)
+from .render_config import (
+    OUTLINE_WIDTH,
+    TYPE_CHUNKS, TYPE_CARDS, TYPE_RELATIVE, TYPE_ABSOLUTE, TYPE_TOTAL,
+    DIR_DONE, DIR_REMAINING, DIR_DONE_TOTAL, DIR_REMAINING_TOTAL,
+)
+
+# Layout stage of ProgressBarWidget.
+# build() turns (session data, RenderConfig, widget size) into a retained list
+# of draw ops; the widget rebuilds it only when one of those changes and its
+# paintEvent just replays it. The live timer text is the only thing that changes
+# between rebuilds, so it is kept apart (LiveText) and re-laid out on its own.
+#
+# Nothing here creates Qt objects: colors and text styles are passed through from
+# the RenderConfig, text is measured with the injected measure(style, text), and
+# rects are plain (x, y, w, h) tuples. A list can be built and inspected without
+# a display.
+
+# Op codes (first item of each op tuple)
+OP_FILL = 0 # (OP_FILL, rect, color)
+OP_PATTERN = 1 # (OP_PATTERN, rect, bg color, stripe color)
+OP_TEXT = 2 # (OP_TEXT, rect, text, style, auto_hide)
+OP_BLEND = 3 # (OP_BLEND, rect, (r, g, b, a)) averaged color of a run of pixel columns
+
+TOP_TEXT_PADDING = 4 # Gap kept clear around the centered bar text
+AUTO_HIDE_TIMER_SAMPLE = "99s"
+
+TEXT_REACH_SECONDS = 35999.999 # 9h 59m 59.999s
+TEXT_REACH_SAMPLE = "99999 100.000%"
+
+
+class BarData:
+    """Session values a display list is built from (see ProgressBarWidget.set_params)."""
+    __slots__ = ("total", "current", "initial_total", "status_log", "time_log", "time_prefix",
+                 "chunks", "verdicts", "start_time", "hovering")
+
+    def __init__(self, total, current, initial_total, status_log, time_log, time_prefix,
+                 chunks=None, verdicts=None, start_time=0, hovering=False):
+        self.total = total
+        self.current = current
+        self.initial_total = initial_total
+        self.status_log = status_log
+        self.time_log = time_log
+        self.time_prefix = time_prefix
+        self.chunks = chunks # ChunkAggregates (chunks bar only)
+        self.verdicts = verdicts # Finished chunk verdict memo, filled in while building
+        self.start_time = start_time
+        self.hovering = hovering
+
+
+class Cell:
+    """Ops of one chunk/card cell; text is drawn after all fills of the cell."""
+    __slots__ = ("left", "right", "fills", "text")
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.fills = []
+        self.text = []
+
+
+class CellText:
+    """Inputs of a cell's labels, kept so the live cell can be laid out again."""
+    __slots__ = ("x", "cell_w", "bar_height", "num_str", "pct_str", "num_style", "pct_style",
+                 "show_num", "show_pct", "safe_zone", "measure")
+
+    def __init__(self, x, cell_w, bar_height, num_str, pct_str, num_style, pct_style,
+                 show_num, show_pct, safe_zone, measure):
+        self.x = x
+        self.cell_w = cell_w
+        self.bar_height = bar_height
+        self.num_str = num_str
+        self.pct_str = pct_str
+        self.num_style = num_style
+        self.pct_style = pct_style
+        self.show_num = show_num
+        self.show_pct = show_pct
+        self.safe_zone = safe_zone # (left, right) of the centered text, or None
+        self.measure = measure
+
+    def ops(self, time_str=None, time_style=None):
+        """Text ops of the cell; a timer string replaces number and percentage."""
+        num_str, pct_str = self.num_str, self.pct_str
+        num_style = self.num_style if time_style is None else time_style
+        show_num, show_pct = self.show_num, self.show_pct
+        if time_str:
+            num_str = time_str
+            pct_str = ""
+            show_num = True
+            show_pct = False
+
+        # Individual collision detection against the centered text
+        if self.safe_zone is not None and (show_num or show_pct):
+            sample_full = " ".join([part for part in [num_str, pct_str] if part])
+            tw_calc = self.measure(num_style, sample_full)
+            tx_calc = self.x + (self.cell_w - tw_calc) / 2
+            if _overlaps(tx_calc - 2, tx_calc + tw_calc + 2, self.safe_zone):
+                show_num = show_pct = False
+
+        x, cell_w, h = self.x, self.cell_w, self.bar_height - 1
+        if show_num and show_pct:
+            return [
+                (OP_TEXT, (x, 0, cell_w / 2, h), num_str, num_style, False),
+                (OP_TEXT, (x + cell_w / 2, 0, cell_w / 2, h), pct_str, self.pct_style, False),
+            ]
+        if show_num:
+            return [(OP_TEXT, (x, 0, cell_w - 1, h), num_str, num_style, False)]
+        if show_pct:
+            return [(OP_TEXT, (x, 0, cell_w - 1, h), pct_str, self.pct_style, False)]
+        return []
+
+
+class LiveText:
+    """The live timer of the current cell: elapsed time since start_time plus base seconds."""
+    __slots__ = ("cell", "cell_text", "timer", "base", "start_time", "positive_only")
+
+    def __init__(self, cell, cell_text, timer, base, start_time, positive_only):
+        self.cell = cell
+        self.cell_text = cell_text
+        self.timer = timer
+        self.base = base
+        self.start_time = start_time
+        self.positive_only = positive_only # Show nothing until time has accumulated (chunk timer)
+
+    def patch(self, now):
+        """Re-lays out only the live cell's text for the time now."""
+        seconds = self.base + (now - self.start_time)
+        if self.positive_only and seconds <= 0:
+            self.cell.text = self.cell_text.ops()
+        else:
+            self.cell.text = self.cell_text.ops(fmt_duration(seconds, self.timer), self.timer.style)
+
+
+class DisplayList:
+    __slots__ = ("width", "height", "dpr", "cells", "overlay", "reach", "live", "live_rect")
+
+    def __init__(self, width, height, dpr=1.0, reach=0.0):
+        self.width = width
+        self.height = height
+        self.dpr = dpr # Device pixels per px the layout was made for
+        self.cells = []
+        self.overlay = [] # Drawn after all cells (centered bar text)
+        self.reach = reach # How far cell text can extend past its cell (see text_reach)
+        self.live = None # LiveText, if a live timer is counting
+        self.live_rect = None # Area of the live timer cell, if its text is shown
+
+    def patch_live(self, now):
+        if self.live is not None:
+            self.live.patch(now)
+
+
+def _overlaps(left, right, zone):
+    # QRectF.intersects for two rects sharing the bar's full height
+    return max(left, zone[0]) < min(right, zone[1])
+
+
+def fmt_duration(seconds, timer):
+    if seconds is None: return ""
+
+    parts = []
+
+    # Minutes
+    if timer.minutes:
+        m = int(seconds // 60)
+        seconds = seconds % 60
+        parts.append(f"{m}m")
+
+    # Seconds
+    if timer.seconds:
+        if timer.milliseconds:
+            val = f"{seconds:.3f}"
+            parts.append(f"{val}s")
+        else:
+            parts.append(f"{int(seconds)}s")
+    elif timer.milliseconds:
+         ms = int((seconds - int(seconds)) * 1000)
+         parts.append(f"{ms}ms")
+
+    return " ".join(parts).strip()
+
+
+def fmt_percentage(pct_val, slot):
+    if slot.show_decimals:
+        return f"{pct_val:.{slot.decimals}f}%"
+    return f"{int(pct_val)}%"
+
+
+def display_value(rc, total, index, max_val, type_mode, is_chunk_bar, chunk_start=0):
+    slot = rc.top.numbers if is_chunk_bar else rc.bottom.numbers
+
+    val = 0
+    if slot.direction == DIR_DONE:
+        # Standard counting 1..N
+        if type_mode in (TYPE_RELATIVE, TYPE_CHUNKS):
+            val = index + 1
+        else: # Absolute / cards
+            if is_chunk_bar:
+                 # Cumulative Cards (e.g., 10, 20, 30...)
+                val = min((index + 1) * rc.chunk_size, total)
+            else:
+                # Global Card Index
+                val = chunk_start + index + 1
+    else: # Remaining
+        # Countdown: N..1
+        if type_mode in (TYPE_RELATIVE, TYPE_CHUNKS):
+            val = max_val - index
+        else: # Absolute / cards
+            if is_chunk_bar:
+                # Cards remaining at START of chunk (e.g., 30, 20, 10...)
+                val = max(0, total - (index * rc.chunk_size))
+            else:
+                # Cards remaining at START of card slot
+                val = total - (chunk_start + index)
+    return str(val)
+
+
+def text_reach(cell_w, timer, num_style, measure):
+    """How far (px) cell text can extend past its cell, incl. outline and antialiasing.
+
+    Conservative bound used to pick the cells a partial repaint must redraw.
+    """
+    widest = max(
+        measure(timer.style, fmt_duration(TEXT_REACH_SECONDS, timer)),
+        measure(num_style, TEXT_REACH_SAMPLE),
+    )
+    # Number and percentage can each get half a cell
+    return max(0.0, (widest - cell_w / 2) / 2) + OUTLINE_WIDTH + 1
+
+
+def evaluate_chunk(rc, chunks, i):
+    """Final (color, pattern color) of a finished chunk from its aggregates."""
+    colors = rc.colors
+    n = chunks.size(i)
+    buried_count = chunks.count(i, STATUS_BURIED)
+    suspended_count = chunks.count(i, STATUS_SUSPENDED)
+    undone_count = chunks.count(i, STATUS_UNDONE)
+
+    # Map Status to Score
+    # Undone counts as a fail; buried, suspended and anything else as good
+    w_hard = rc.w_good if rc.use_good_for_all_pass else rc.w_hard
+    w_easy = rc.w_good if rc.use_good_for_all_pass else rc.w_easy
+    score_sum = chunks.score_sum(i, rc.w_again, w_hard, rc.w_good, w_easy)
+    avg = score_sum / n if n else rc.w_good
+
+    # Same result as scanning rc.intervals, see IntervalClassifier
+    final_color, pattern_color = rc.classifier.classify(avg)
+
+    # Override for All-Buried / All-Suspended / All-Skipped
+    if n:
+        if buried_count == n:
+            final_color = colors["buried"]
+        elif suspended_count == n:
+            final_color = colors["suspended"]
+        elif undone_count == n:
+            final_color = colors["undone"]
+        elif buried_count + suspended_count == n:
+             # Mixed skipped (e.g. 5 buried, 5 suspended) -> majority wins, Buried on ties
+             final_color = colors["buried"] if buried_count >= suspended_count else colors["suspended"]
+
+    return final_color, pattern_color
+
+
+def _bar_text(bn, bp, v_done, v_rem, v_total, ratio):
+    """Centered bar text and its style, or ("", style) if both parts are off."""
+    style = bn.style # Default style for center
+    parts = []
+
+    # Bar Numbers
+    if bn.enabled:
+        if bn.direction == DIR_REMAINING:
+            val = str(v_rem)
+        elif bn.direction == DIR_DONE_TOTAL:
+            val = f"{v_done}/{v_total}"
+        elif bn.direction == DIR_REMAINING_TOTAL:
+            val = f"{v_rem}/{v_total}"
+        else: # done (default)
+            val = str(v_done)
+        parts.append(val)
+
+    # Bar Percentages
+    if bp.enabled:
+        pct_val = ratio * 100
+        if bp.direction == DIR_REMAINING: pct_val = 100 - pct_val
+        parts.append(fmt_percentage(pct_val, bp))
+        if not bn.enabled:
+             style = bp.style
+
+    return " - ".join(parts), style
+
+
+def _hide_all_text(rc, slots, count_str, timer, cell_w, measure):
+    """All-or-nothing auto hide: True if a typical cell label would overflow its cell."""
+    if not rc.auto_hide:
+        return False
+    t_num, t_pct = slots.numbers, slots.percentages
+    # Sample most likely scenario for overflow
+    s_parts = []
+    # 1. Check relative number (e.g. 99)
+    if t_num.enabled and t_num.type != TYPE_TOTAL: s_parts.append(count_str)
+    # 2. Check percentage (e.g. 100%)
+    if t_pct.enabled and t_pct.type != TYPE_TOTAL: s_parts.append("100%")
+    # 3. Check timer (e.g. 99s)
+    if timer.enabled: s_parts.append(AUTO_HIDE_TIMER_SAMPLE)
+
+    if not s_parts:
+        return False
+    # Check if total width of all enabled parts exceeds cell width
+    # Space-delimited if multiple
+    return measure(t_num.style, " ".join(s_parts)) > cell_w
+
+
+def _add_bar_text(dl, centered_str, style, width, bar_height, hovering, auto_hide, measure):
+    """Queues the centered text; returns the zone cell labels must keep clear of (or None)."""
+    if not centered_str or hovering:
+        return None
+    dl.overlay.append((OP_TEXT, (0, 0, width, bar_height), centered_str, style, auto_hide))
+    # Define safe zone with padding
+    text_width = measure(style, centered_str)
+    left_x = (width - text_width) / 2 - TOP_TEXT_PADDING
+    return (left_x, left_x + text_width + 2 * TOP_TEXT_PADDING)
+
+
+def build(bar_type, rc, width, height, data, measure, now, dpr=1.0):
+    """DisplayList of a chunks or cards bar; now is the time the live timer shows."""
+    if bar_type == "chunks":
+        return _build_chunks(rc, width, height, data, measure, now, dpr)
+    return _build_cards(rc, width, height, data, measure, now, dpr)
+
+
+def _chunk_fills(rc, chunks, verdicts, i, current_chunk_idx, normal_total, effective_total, rect_f):
+    """Fill/pattern ops of chunk i (later ops paint over earlier ones)."""
+    colors = rc.colors
+    chunk_size = rc.chunk_size
+    hl_excess = rc.highlight_excess
+    str_again = rc.striped_again
+    ops = []
+
+    # Base Colors & Logic
+    c_start = i * chunk_size
+    c_end = (i + 1) * chunk_size
+
+    # Identify special states
+    is_mixed_excess = False
+    is_mixed_fail = False
+    is_mixed_undo = False
+
+    # Check Mixed Excess (Pending + Excess) - ALWAYS check regardless of fail_policy
+    # This is needed to visualize chunks that extend beyond normal_total
+    # Only mark if we are ACTUALLY exceeding the initial total (e.g. via fails)
+    # Otherwise, the last chunk is just the last chunk (partial or full).
+    if c_start < normal_total and c_end > normal_total and effective_total > normal_total:
+        is_mixed_excess = True
+
+    if rc.fail_ack:
+        # Check Mixed Fail (Done + Fail)
+        if i <= current_chunk_idx:
+            n = chunks.size(i)
+            if n:
+                 fails = chunks.count(i, STATUS_AGAIN)
+                 if fails:
+                     # "All fail" (finished chunk) is already conveyed by the average color
+                     if not (fails == n and i < current_chunk_idx):
+                         is_mixed_fail = True
+
+                 if chunks.count(i, STATUS_UNDONE):
+                     is_mixed_undo = True
+
+    # Apply Color
+    if i < current_chunk_idx:
+        # Finished chunks only change on config change or undo
+        verdict = verdicts.get(i)
+        if verdict is None:
+            verdict = verdicts[i] = evaluate_chunk(rc, chunks, i)
+        final_color, pattern_color = verdict
+
+        if pattern_color:
+            ops.append((OP_PATTERN, rect_f, final_color, pattern_color))
+        else:
+            ops.append((OP_FILL, rect_f, final_color))
+
+        # Striped Patterns for Fail/Undo/Mix
+        # Fail Overrides (Explicit Red Stripe)
+        if is_mixed_fail and str_again:
+             ops.append((OP_PATTERN, rect_f, final_color, colors["again"]))
+
+        if is_mixed_undo:
+             # Undo stripe
+             ops.append((OP_PATTERN, rect_f, final_color, colors["undone"]))
+
+    elif i == current_chunk_idx:
+        # Current Chunk
+        # Use special 'current' color unless explicit highlight
+        col = colors["current"]
+
+        # User Request: "just want the stripes to be gone and just have the current color"
+        # We ignore is_mixed_excess for the current chunk and just draw it solid
+        ops.append((OP_FILL, rect_f, col))
+
+        # Visualize mixed states in current chunk,
+        # otherwise the user sees "nothing happened"
+        if is_mixed_fail and str_again:
+             ops.append((OP_PATTERN, rect_f, col, colors["again"]))
+
+        if is_mixed_undo:
+             ops.append((OP_PATTERN, rect_f, col, colors["undone"]))
+
+    else: # i > current_chunk_idx (Future)
+        # Future Chunks
+        col = colors["pending"]
+
+        if is_mixed_excess and hl_excess:
+             ops.append((OP_PATTERN, rect_f, col, colors["excess"]))
+        else:
+             ops.append((OP_FILL, rect_f, col))
+        # Check if this is an excess chunk (beyond original total)
+        if c_start >= normal_total:
+            # Fully excess future chunk - solid color
+            if hl_excess:
+                ops.append((OP_FILL, rect_f, colors["excess"]))
+            else:
+                ops.append((OP_FILL, rect_f, colors["pending"]))
+        elif is_mixed_excess:
+            # Mixed excess future chunk - partially contains excess cards
+            # Automatically stripe if highlight is on
+            if hl_excess:
+                # Stripe: future background with again_chunk foreground
+                ops.append((OP_PATTERN, rect_f, colors["pending"], colors["excess"]))
+            else:
+                ops.append((OP_FILL, rect_f, colors["pending"]))
+        else:
+            # Normal future chunk
+            ops.append((OP_FILL, rect_f, colors["pending"]))
+
+    return ops
+
+
+def _add_lod_columns(dl, rc, data, total_chunks, chunk_w, current_chunk_idx, normal_total, effective_total):
+    """Chunks bucketed into device pixel columns (by their center), one averaged color per column.
+
+    Neighbouring columns of equal color merge into one run, so the ops are bounded by
+    the widget width rather than the session length. Chunk labels are unreadable at
+    this size and are left out.
+    """
+    dpr = dl.dpr
+    rgba_of = {}
+
+    def rgba(color):
+        value = rgba_of.get(id(color))
+        if value is None:
+            value = rgba_of[id(color)] = color.getRgb()
+        return value
+
+    runs = [] # [first column, end column, rgba]
+
+    def close(column, end, sums, n):
+        color = tuple(int(round(v / n)) for v in sums)
+        if runs and runs[-1][2] == color:
+            runs[-1][1] = end
+        else:
+            runs.append([column, end, color])
+
+    column = -1
+    sums = None
+    n = 0
+    for i in range(total_chunks):
+        # The last op covers the whole cell, so it decides what the chunk looks like
+        op = _chunk_fills(rc, data.chunks, data.verdicts, i, current_chunk_idx, normal_total, effective_total, None)[-1]
+        if op[0] == OP_PATTERN:
+            # Stripes cover half of the cell
+            bg, fg = rgba(op[2]), rgba(op[3])
+            color = [(bg[k] + fg[k]) / 2 for k in range(4)]
+        else:
+            color = rgba(op[2])
+
+        c = int((i + 0.5) * chunk_w * dpr)
+        if c != column:
+            if n:
+                close(column, c, sums, n)
+            column = c
+            sums = [0.0, 0.0, 0.0, 0.0]
+            n = 0
+        for k in range(4):
+            sums[k] += color[k]
+        n += 1
+    close(column, math.ceil(dl.width * dpr), sums, n)
+
+    h = dl.height - 1
+    for first, end, color in runs:
+        x = first / dpr
+        w = (end - first) / dpr
+        cell = Cell(x, x + w)
+        cell.fills.append((OP_BLEND, (x, 0, w, h), color))
+        dl.cells.append(cell)
+
+
+def _build_chunks(rc, width, height, data, measure, now, dpr):
+    bar_height = height # Simple fill
+    chunk_size = rc.chunk_size
+    total = data.total
+    current = data.current
+    # Use initial_total (original total at session start) for excess calculation
+    normal_total = data.initial_total
+    # Ensure bar grows if total (including fails) exceeds initial total
+    # Use total here, not current, so the bar grows immediately when cards are failed
+    effective_total = max(normal_total, total)
+    total_chunks = (effective_total + chunk_size - 1) // chunk_size
+    if total_chunks < 1: total_chunks = 1
+
+    current_chunk_idx = current // chunk_size
+
+    chunk_w = width / total_chunks
+
+    # --- Text Config ---
+    # Read from text_options.top for chunks bar
+    text = rc.top
+    t_num = text.numbers
+    t_pct = text.percentages
+    bn = text.bar_numbers
+    bp = text.bar_percentages
+    chunk_timer = rc.chunk_timer
+
+    # Level of detail: chunks narrower than a device pixel are drawn per pixel column
+    lod = chunk_w * dpr < 1
+    reach = 0.0 if lod else text_reach(chunk_w, chunk_timer, t_num.style, measure)
+    dl = DisplayList(width, height, dpr, reach)
+
+    # Centered Text (Bar Text)
+    # "done" mode shows the current position (1-based chunk),
+    # "remaining" shows total_chunks - current_chunk_idx.
+    if bn.type == TYPE_CARDS:
+        v_done, v_rem, v_total = current, max(0, total - current), total
+    else:
+        v_done, v_rem, v_total = current_chunk_idx + 1, max(0, total_chunks - current_chunk_idx), total_chunks
+    if bp.type == TYPE_CHUNKS:
+        # Percentage of CHUNKS passed
+        # If I am in chunk 1 (idx 0), I have passed 0.
+        ratio = current_chunk_idx / total_chunks if total_chunks > 0 else 0
+    else:
+        # Cards (Default)
+        ratio = current / total if total > 0 else 0
+    centered_str, c_style = _bar_text(bn, bp, v_done, v_rem, v_total, ratio)
+    safe_zone = _add_bar_text(dl, centered_str, c_style, width, bar_height, data.hovering, rc.auto_hide, measure)
+
+    if lod:
+        _add_lod_columns(dl, rc, data, total_chunks, chunk_w, current_chunk_idx, normal_total, effective_total)
+        return dl
+
+    show_num = t_num.enabled and t_num.type != TYPE_TOTAL
+    show_pct = t_pct.enabled and t_pct.type != TYPE_TOTAL
+    hide_all_chunk_text = _hide_all_text(rc, text, str(total_chunks), chunk_timer, chunk_w, measure)
+
+    chunks = data.chunks
+    time_prefix = data.time_prefix
+    verdicts = data.verdicts
+    for i in range(total_chunks):
+        x = i * chunk_w
+        rect_f = (x, 0, chunk_w - 1, bar_height - 1)
+        cell = Cell(x, x + chunk_w)
+        dl.cells.append(cell)
+        cell.fills = _chunk_fills(rc, chunks, verdicts, i, current_chunk_idx, normal_total, effective_total, rect_f)
+
+        if hide_all_chunk_text:
+            continue
+
+        if chunk_timer.live and i == current_chunk_idx:
+            # The only text that changes between live ticks
+            dl.live_rect = (x - dl.reach, 0, chunk_w - 1 + 2 * dl.reach, bar_height)
+
+        # Determine what text would be shown
+        num_str_chunk = ""
+        pct_str_chunk = ""
+        if show_num: num_str_chunk = display_value(rc, total, i, total_chunks, t_num.type, True)
+        if show_pct:
+            if t_pct.type == TYPE_CHUNKS:
+                 if t_pct.direction == DIR_REMAINING:
+                     rem_chunks = max(0, total_chunks - i)
+                     ratio_calc = rem_chunks / total_chunks if total_chunks > 0 else 0
+                 else:
+                     done_chunks = i + 1
+                     ratio_calc = done_chunks / total_chunks if total_chunks > 0 else 0
+            else:
+                if t_pct.direction == DIR_REMAINING:
+                    rem_cards = max(0, total - (i * chunk_size))
+                    ratio_calc = rem_cards / total if total > 0 else 0
+                else:
+                    c_end_c = (i + 1) * chunk_size
+                    ratio_calc = min(c_end_c, total) / total if total > 0 else 0
+
+            pct_str_chunk = fmt_percentage(ratio_calc * 100, t_pct)
+
+        cell_text = CellText(x, chunk_w, bar_height, num_str_chunk, pct_str_chunk, t_num.style, t_pct.style,
+                             show_num, show_pct, safe_zone, measure)
+
+        # Timer Overrides
+        if chunk_timer.enabled and i < current_chunk_idx:
+            c_time = span_time(time_prefix, i * chunk_size, (i + 1) * chunk_size)
+            if c_time > 0:
+                cell.text = cell_text.ops(fmt_duration(c_time, chunk_timer), chunk_timer.style)
+                continue
+        elif chunk_timer.live and i == current_chunk_idx and data.start_time > 0:
+            # Current card elapsed plus the previous cards in THIS chunk
+            prev_sum = span_time(time_prefix, i * chunk_size, current)
+            dl.live = LiveText(cell, cell_text, chunk_timer, prev_sum, data.start_time, True)
+            dl.live.patch(now)
+            continue
+        cell.text = cell_text.ops()
+
+    return dl
+
+
+def _build_cards(rc, width, height, data, measure, now, dpr):
+    bar_height = height # Simple fill
+    colors = rc.colors
+    total = data.total
+    current = data.current
+    status_log = data.status_log
+    time_log = data.time_log
+
+    # Chunk Zoom Mode (Cards Bar)
+    chunk_size = rc.chunk_size
+    current_chunk_idx = current // chunk_size
+    start_offset = current_chunk_idx * chunk_size
+
+    # Show only the cards that exist in this chunk
+    normal_total = data.initial_total
+    effective_total_c = max(normal_total, total)
+    total_items = min(chunk_size, max(0, effective_total_c - start_offset))
+    if total_items < 1: total_items = 1
+
+    # Read from text_options.bottom for cards bar
+    text = rc.bottom
+    t_num = text.numbers
+    t_pct = text.percentages
+    bn = text.bar_numbers
+    bp = text.bar_percentages
+    card_timer = rc.card_timer
+
+    item_w = width / total_items
+
+    dl = DisplayList(width, height, dpr, text_reach(item_w, card_timer, t_num.style, measure))
+
+    # Centered Text (Safe Zone)
+    # Relative to Chunk Limit (Cards in this chunk)
+    # If we are in chunk 2 (idx 1), cards 0-9 are done. current=10. start=10. curr_in_chunk=0.
+    # If current=15. start=10. curr_in_chunk=5.
+    cur_in_chunk = max(0, min(total_items, current - start_offset))
+    if bn.type == TYPE_RELATIVE:
+        v_done, v_rem, v_total = cur_in_chunk, max(0, total_items - cur_in_chunk), total_items
+    else:
+        # Absolute (Total Session Cards)
+        v_done, v_rem, v_total = current, max(0, total - current), total
+    if bp.type == TYPE_RELATIVE:
+        ratio = cur_in_chunk / total_items if total_items > 0 else 0
+    else:
+        # Absolute (Total Session)
+        ratio = current / total if total > 0 else 0
+    centered_str, c_style = _bar_text(bn, bp, v_done, v_rem, v_total, ratio)
+    safe_zone = _add_bar_text(dl, centered_str, c_style, width, bar_height, data.hovering, rc.auto_hide, measure)
+
+    show_num = t_num.enabled and t_num.type != TYPE_TOTAL
+    show_pct = t_pct.enabled and t_pct.type != TYPE_TOTAL
+    hide_all_card_text = _hide_all_text(rc, text, str(total_items), card_timer, item_w, measure)
+
+    u_good_pass = rc.use_good_for_all_pass
+    card_color_keys = {
+        STATUS_AGAIN: "again",
+        STATUS_HARD: "good" if u_good_pass else "hard",
+        STATUS_GOOD: "good",
+        STATUS_EASY: "good" if u_good_pass else "easy",
+        STATUS_UNDONE: "undone",
+        STATUS_BURIED: "buried",
+        STATUS_SUSPENDED: "suspended",
+    }
+    for i in range(total_items):
+        x = i * item_w
+        rect_f = (x, 0, item_w - 1, bar_height - 1)
+        cell = Cell(x, x + item_w)
+        dl.cells.append(cell)
+
+        # For 'cards' bar showing all cards, global index is just i
+        global_idx = start_offset + i
+
+        # Colors
+        if global_idx < current:
+            color = colors["good"]
+            if global_idx < len(status_log):
+                key = card_color_keys.get(status_log[global_idx])
+                if key:
+                    color = colors[key]
+            cell.fills.append((OP_FILL, rect_f, color))
+        elif global_idx == current:
+            # Current card being reviewed
+            cell.fills.append((OP_FILL, rect_f, colors["current"]))
+        else:
+            # Future cards in this chunk
+            cell.fills.append((OP_FILL, rect_f, colors["pending"]))
+
+        if hide_all_card_text:
+            continue
+
+        if card_timer.live and global_idx == current:
+            # The only text that changes between live ticks
+            dl.live_rect = (x - dl.reach, 0, item_w - 1 + 2 * dl.reach, bar_height)
+
+        # Determine base content
+        num_str_card = ""
+        pct_str_card = ""
+        if show_num:
+            num_str_card = display_value(rc, total, i, total_items, t_num.type, False, start_offset)
+
+        if show_pct:
+            if t_pct.type in (TYPE_TOTAL, TYPE_ABSOLUTE):
+                 # Global Percentage (of session total)
+                 current_global = start_offset + i + 1
+                 ratio_calc = current_global / total if total > 0 else 0
+            else:
+                 # Relative Percentage (of chunk)
+                 ratio_calc = (i + 1) / total_items if total_items > 0 else 0
+
+            p_val = ratio_calc * 100
+            if t_pct.direction == DIR_REMAINING: p_val = 100 - p_val
+
+            pct_str_card = fmt_percentage(p_val, t_pct)
+
+        cell_text = CellText(x, item_w, bar_height, num_str_card, pct_str_card, t_num.style, t_pct.style,
+                             show_num, show_pct, safe_zone, measure)
+
+        # Timer Overrides
+        if card_timer.enabled and global_idx < len(time_log):
+            t_card = time_log[global_idx]
+            if t_card > 0:
+                cell.text = cell_text.ops(fmt_duration(t_card, card_timer), card_timer.style)
+                continue
+        elif card_timer.live and global_idx == current and data.start_time > 0:
+            dl.live = LiveText(cell, cell_text, card_timer, 0.0, data.start_time, False)
+            dl.live.patch(now)
+            continue
+        cell.text = cell_text.ops()
+
+    return dl
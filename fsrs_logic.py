@@ -1,4 +1,5 @@
-from .config_utils import DEFAULT_CONFIG, get_config_val
+from .config_utils import get_config_val, get_defaults, thaw
+from .config_schema import current_config, write_config
 from aqt import mw
 from aqt.utils import tooltip
 from .state import session
@@ -78,15 +79,16 @@ def calculate_fsrs_intervals(chunk_size, retention):
     
     return weights, intervals
 
-def get_avg_retention(deck_id):
-    """Recursively fetch and average desiredRetention for a deck and its subdecks."""
+def get_avg_retention(col, deck_id):
+    """Recursively fetch and average desiredRetention for a deck and its subdecks.
+    col: the collection (the QueryOp's col when run on a worker thread)."""
     
     # Fetch all deck names/ids
     try:
         # Modern Anki 2.1.50+
-        name = mw.col.decks.name(deck_id)
+        name = col.decks.name(deck_id)
         # subdecks logic: find all decks starting with "name::" or name itself
-        all_decks = mw.col.decks.all_names_and_ids()
+        all_decks = col.decks.all_names_and_ids()
         target_ids = []
         for d in all_decks:
             if d.name == name or d.name.startswith(name + "::"):
@@ -100,14 +102,14 @@ def get_avg_retention(deck_id):
         try:
             # Try to get retention from deck config
             # 1. Get conf ID
-            deck_obj = mw.col.decks.get(did)
+            deck_obj = col.decks.get(did)
             if not deck_obj: continue
             
             conf_id = deck_obj.get("conf")
             if not conf_id: continue
             
             # 2. Get config dict
-            dconf = mw.col.decks.get_config(conf_id)
+            dconf = col.decks.get_config(conf_id)
             if not dconf: continue
             
             # 3. Try common FSRS keys
@@ -129,50 +131,73 @@ def get_avg_retention(deck_id):
         
     return sum(retentions) / len(retentions)
 
-def check_fsrs_deck_update(force=False):
+def _current_deck_id():
+    did = mw.col.decks.get_current_id()
+    if not did:
+        did = mw.col.decks.selected()
+    return did
+
+def pending_deck_update(force=False):
+    """Deck id whose FSRS retention needs to be (re)applied, or None."""
+    if not mw.col: return None
+    
+    if not current_config().fsrs_use_deck:
+        return None
+        
+    # Get current deck ID
+    did = _current_deck_id()
+    if not did: return None
+    
+    if did == session.last_deck_id and not force:
+        return None
+    return did
+
+def check_fsrs_deck_update_in_background(force=False):
+    """Applies the current deck's FSRS retention if the deck changed, with the
+    deck config reads on a worker thread."""
+    did = pending_deck_update(force)
+    if did is None: return
+    from .background import run_in_background
+    run_in_background(
+        lambda col: get_avg_retention(col, did),
+        lambda retention: apply_deck_retention(did, retention),
+    )
+
+def apply_deck_retention(did, retention):
     """
-    Checks if deck changed and updates config with deck-specific FSRS retention.
+    Main-thread half of the FSRS update: writes intervals for a fetched retention.
+    retention is get_avg_retention(did) (None if the deck has no FSRS targets).
     Returns True if config was updated.
     """
     if not mw.col: return
     
-    config = mw.addonManager.getConfig(__name__)
-    if not get_config_val(config, DEFAULT_CONFIG, "fsrs_use_deck"):
+    # Fetched for a deck the user has since left
+    if did != _current_deck_id():
         return
-        
-    # Get current deck ID
-    did = mw.col.decks.get_current_id()
-    if not did:
-        did = mw.col.decks.selected()
-    if not did: return
+    
+    config = thaw(current_config().data) # Edited and written below
     
     # Get deck name for tooltip
     try:
         dname = mw.col.decks.name(did)
     except:
         dname = "Unknown Deck"
-    
-    if did == session.last_deck_id and not force:
-        return
         
     session.last_deck_id = did
     
-    # Calculate Target Retention
-    retention = get_avg_retention(did)
-    
     # Track if we used fallback
     using_fallback = False
     
     # Fallback to user default
     if retention is None:
-        retention = get_config_val(config, DEFAULT_CONFIG, "fsrs_retention")
+        retention = get_config_val(config, get_defaults(), "fsrs_retention")
         using_fallback = True
     
     # Standardize retention to float
     retention = float(retention)
         
     # Calculate New Intervals
-    chunk_size = get_config_val(config, DEFAULT_CONFIG, "chunk_size")
+    chunk_size = get_config_val(config, get_defaults(), "chunk_size")
     weights, intervals = calculate_fsrs_intervals(chunk_size, retention)
     
     new_ce = {
@@ -185,13 +210,11 @@ def check_fsrs_deck_update(force=False):
     
     if new_ce != current_ce:
         config["chunk_evaluation"] = new_ce
-        # Persist
-        mw.addonManager.writeConfig(__name__, config)
-        # Note: writeConfig triggers update_all_widgets via existing hook
-        # Explicitly call it with fresh config to guarantee UI refresh
-        fresh_config = mw.addonManager.getConfig(__name__)
+        # Persist (writeConfig does not run the config updated action)
+        config = write_config(config)
+        # Explicitly refresh the bars with the saved config
         from . import layout
-        layout.update_all_widgets(fresh_config)
+        layout.update_all_widgets(config)
         
         # Notify User
         if using_fallback:
@@ -1,7 +1,8 @@
 from aqt import mw
 from aqt.qt import *
 from .progressbar import ProgressBarWidget
-from .config_utils import DEFAULT_CONFIG, get_config_val
+from .config_utils import get_config_val, get_defaults, thaw
+from .config_schema import current_config, load_config, write_config
 # Note: circular dependency avoidance - we don't import init/logic here.
 # Settings dialog will need to be imported inside functions if needed.
 
@@ -35,7 +36,9 @@ def init_widgets():
     card_widget = ProgressBarWidget("cards")
     card_widget.settings_callback = open_settings
     
-    config = mw.addonManager.getConfig(__name__)
+    global _applied_config
+    config = load_config()
+    _applied_config = config
     chunk_widget.update_config(config)
     card_widget.update_config(config)
     
@@ -51,37 +54,109 @@ def init_widgets():
 
 def open_settings():
     from .settings import SettingsDialog
-    config = mw.addonManager.getConfig(__name__)
-    # Ensure default structure if missing keys
+    config = thaw(current_config().data) # Normalised, every key is present
     d = SettingsDialog(mw, config)
     
     # Inject live update callback
     d.live_callback = update_all_widgets
     
     d.exec()
-    # Updates are handled via setConfigUpdatedAction which is triggered by writeConfig in the dialog
+    # The dialog previews through live_callback and writes the config once on OK
+
+# Config change classes, each needing only part of a full refresh
+CHANGE_PAINT = "paint" # Recompile the bars' render config and repaint
+CHANGE_LAYOUT = "layout" # Re-insert the bars into mw.mainLayout
+CHANGE_EVALUATION = "evaluation" # Also drop cached chunk verdicts
+CHANGE_CALCULATION = "calculation" # Recompute totals from the session
+CHANGE_FSRS = "fsrs" # Re-fetch FSRS targets for the current deck
+
+# Top-level config key -> change classes; visual_options is split per key below.
+# Unknown keys get every class
+CONFIG_CHANGES = {
+    "positions": (CHANGE_LAYOUT,),
+    "text_options": (CHANGE_PAINT,),
+    "timer": (CHANGE_PAINT,),
+    "colors": (CHANGE_EVALUATION,), # Cached verdicts hold colors
+    "chunk_evaluation": (CHANGE_EVALUATION,),
+    "chunk_size": (CHANGE_CALCULATION, CHANGE_FSRS),
+    "double_new": (CHANGE_CALCULATION,),
+    "fail_policy": (CHANGE_CALCULATION,),
+    # Read when the event happens, nothing shown changes
+    "bury_policy": (),
+    "suspend_policy": (),
+    "undo_policy": (),
+    "fsrs_retention": (CHANGE_FSRS,),
+    "fsrs_auto_chunk": (CHANGE_FSRS,),
+    "fsrs_use_deck": (CHANGE_FSRS,),
+}
+VISUAL_OPTION_CHANGES = {
+    "use_good_for_all_pass": (CHANGE_EVALUATION,),
+}
+ALL_CHANGES = (CHANGE_PAINT, CHANGE_LAYOUT, CHANGE_EVALUATION, CHANGE_CALCULATION, CHANGE_FSRS)
+
+# Config the widgets were last updated with
+_applied_config = None
+
+def classify_config_change(old, new):
+    """Set of change classes between two configs (all of them if old is None)."""
+    if old is None:
+        return set(ALL_CHANGES)
+    changes = set()
+    for key in set(old) | set(new):
+        old_val = old.get(key)
+        new_val = new.get(key)
+        if old_val == new_val:
+            continue
+        if key == "visual_options":
+            old_val = old_val or {}
+            new_val = new_val or {}
+            for sub in set(old_val) | set(new_val):
+                if old_val.get(sub) != new_val.get(sub):
+                    changes.update(VISUAL_OPTION_CHANGES.get(sub, (CHANGE_PAINT,)))
+        else:
+            changes.update(CONFIG_CHANGES.get(key, ALL_CHANGES))
+    return changes
+
+def on_config_edited(config):
+    """setConfigUpdatedAction hook: the add-on config editor saved a raw config."""
+    update_all_widgets(write_config(config))
 
 def update_all_widgets(config):
-    if chunk_widget: chunk_widget.update_config(config)
-    if card_widget: card_widget.update_config(config)
-    apply_layout(config)
+    global _applied_config
+    changes = classify_config_change(_applied_config, config)
+    _applied_config = config
+    if not changes:
+        return
+    
+    # Evaluation and calculation changes also change what is painted
+    if changes - {CHANGE_LAYOUT, CHANGE_FSRS}:
+        reevaluate = CHANGE_EVALUATION in changes or CHANGE_CALCULATION in changes
+        if chunk_widget: chunk_widget.update_config(config, reevaluate)
+        if card_widget: card_widget.update_config(config, reevaluate)
+    
+    if CHANGE_LAYOUT in changes:
+        apply_layout(config)
     
-    # Invalidate FSRS cache to force re-check if settings changed
     from .state import session
-    session.last_deck_id = None
-    session.initial_total = None # Reset total to recalculate with new settings (e.g. double_new)
+    if CHANGE_FSRS in changes:
+        # Invalidate FSRS cache to force re-check with the new settings
+        session.last_deck_id = None
     
-    # Force logic refresh to apply new calculation settings (like double_new)
-    from . import logic
-    logic.refresh_bar()
+    if CHANGE_CALCULATION in changes:
+        session.initial_total = None # Reset total to recalculate with new settings (e.g. double_new)
+        # Logic refresh applies the new calculation settings; the config may
+        # only be a preview, so pass it instead of re-reading it
+        from . import logic
+        logic.refresh_bar(config=config)
 
 def apply_layout(config):
     global chunk_widget, card_widget
     
     # Determine positions
     # Use centralized config defaults
-    chunk_pos = get_config_val(config, DEFAULT_CONFIG, "positions", "chunks")
-    card_pos = get_config_val(config, DEFAULT_CONFIG, "positions", "cards")
+    defaults = get_defaults()
+    chunk_pos = get_config_val(config, defaults, "positions", "chunks")
+    card_pos = get_config_val(config, defaults, "positions", "cards")
     
     # Remove existing
     if chunk_widget:
@@ -93,7 +168,7 @@ def apply_layout(config):
         mw.mainLayout.removeWidget(card_widget)
         
     # Re-insert based on stacking order
-    stack = get_config_val(config, DEFAULT_CONFIG, "positions", "stack_order")
+    stack = get_config_val(config, defaults, "positions", "stack_order")
     
     # TOP DOCK: insertWidget(0, w) pushes previous 0 to 1.
     top_sequence = [card_widget, chunk_widget] if stack == "chunk" else [chunk_widget, card_widget]
@@ -120,9 +195,16 @@ def apply_layout(config):
         if chunk_pos != "hidden": chunk_widget.show()
         if card_pos != "hidden": card_widget.show()
 
-def refresh_widgets(total, current, status_log, time_log, start_time, initial_total):
+def refresh_widgets(total, current, status_log, time_log, start_time, initial_total, chunks=None, time_prefix=None):
     """Updates the data in both widgets"""
     if chunk_widget:
-        chunk_widget.set_params(total, current, status_log, time_log, start_time, initial_total)
+        chunk_widget.set_params(total, current, status_log, time_log, start_time, initial_total, chunks, time_prefix)
+    if card_widget:
+        card_widget.set_params(total, current, status_log, time_log, start_time, initial_total, chunks, time_prefix)
+
+def set_loading(loading):
+    """Shows/clears the loading state while the session log is rebuilt"""
+    if chunk_widget:
+        chunk_widget.set_loading(loading)
     if card_widget:
-        card_widget.set_params(total, current, status_log, time_log, start_time, initial_total)
+        card_widget.set_loading(loading)
@@ -2,10 +2,26 @@ from aqt import mw
 from aqt.utils import tooltip
 from aqt.qt import QTimer
 import time
-from .config_utils import DEFAULT_CONFIG, get_config_val
-from .state import session
+from bisect import bisect_left
+from .config_schema import AddonConfig, current_config
+from .state import session, log_cache, status_code, STATUS_AGAIN, STATUS_BURIED, STATUS_SUSPENDED
 from . import layout
 from . import fsrs_logic
+from .background import run_in_background
+from . import snapshot
+from . import ticker
+
+# Max distance between a manual action and a revlog row for the same card to count as one event
+MANUAL_MATCH_WINDOW_MS = 5000
+
+# Policy deciding whether a manual action of this status shows on the bar
+MANUAL_ACTION_POLICIES = {
+    STATUS_BURIED: "bury_policy",
+    STATUS_SUSPENDED: "suspend_policy",
+}
+
+# Incremented per load_history call; results of older jobs are dropped
+_load_token = 0
 
 def on_show_question(card):
     # CATCH-ALL: Check if previous card was skipped (Buried/Suspended) without triggering a hook
@@ -15,10 +31,10 @@ def on_show_question(card):
             # Queue: -1=Suspended, -2=User Buried, -3=Sched Buried
             if prev_card.queue == -1:
                 # Detected Missed Suspend
-                _handle_other_event("suspend_policy", "suspended", prev_card)
+                _handle_other_event("suspend_policy", STATUS_SUSPENDED, prev_card)
             elif prev_card.queue in [-2, -3]:
                 # Detected Missed Bury
-                _handle_other_event("bury_policy", "buried", prev_card)
+                _handle_other_event("bury_policy", STATUS_BURIED, prev_card)
         except:
              pass # Card might be deleted or invalid
     
@@ -29,9 +45,9 @@ def on_show_question(card):
     session.start_time = time.time()
 
 def on_answer(reviewer, card, ease):
-    config = mw.addonManager.getConfig(__name__)
-    fail_policy = get_config_val(config, DEFAULT_CONFIG, "fail_policy")
-    use_cap = get_config_val(config, DEFAULT_CONFIG, "timer", "use_anki_cap")
+    config = current_config()
+    fail_policy = config.fail_policy
+    use_cap = config.use_anki_cap
     
     passed = ease > 1
     
@@ -61,31 +77,42 @@ def on_answer(reviewer, card, ease):
     else:
         # Failed (ease 1)
         # Handle 'count' legacy as 'acknowledge'
-        if fail_policy in ["acknowledge", "count"]:
+        if fail_policy == "acknowledge":
             should_update = True
             result = ease
         else:
             should_update = False
             
+    if session.loading:
+        # The log is being rebuilt from the revlog; start over so it includes this answer
+        load_history(full=True)
+        return
+    
     if should_update:
-        # SNAPSHOT BEFORE CHANGE
-        session.history.append((session.current_count, list(session.status_log), list(session.time_log)))
-        
-        # APPLY CHANGE
-        session.current_count += 1
-        session.status_log.append(result)
-        session.time_log.append(elapsed)
+        # APPLY CHANGE (journaled for undo)
+        session.append_review(result, elapsed)
+    
+    # This answer's revlog row is now accounted for; don't fold it in again on re-entry
+    _advance_revlog_cursor()
         
     # Use a small delay to allow Anki's scheduler to update its counts
     QTimer.singleShot(50, refresh_bar)
 
+def _advance_revlog_cursor():
+    try:
+        last_id = mw.col.db.scalar("select max(id) from revlog")
+    except:
+        return
+    if last_id:
+        session.last_revlog_id = max(session.last_revlog_id, last_id)
+
 def on_bury(reviewer, card):
     if session.last_action_handled:
         return
     if session.last_handled_card_id == card.id:
         return
     session.last_action_handled = True
-    _handle_other_event("bury_policy", "buried", card)
+    _handle_other_event("bury_policy", STATUS_BURIED, card)
 
 def on_suspend(reviewer, card):
     if session.last_action_handled:
@@ -93,11 +120,11 @@ def on_suspend(reviewer, card):
     if session.last_handled_card_id == card.id:
         return
     session.last_action_handled = True
-    _handle_other_event("suspend_policy", "suspended", card)
+    _handle_other_event("suspend_policy", STATUS_SUSPENDED, card)
 
 def _handle_other_event(policy_key, result_code, card):
-    config = mw.addonManager.getConfig(__name__)
-    policy = get_config_val(config, DEFAULT_CONFIG, policy_key)
+    config = current_config()
+    policy = config.policy(policy_key)
 
 
     
@@ -105,8 +132,7 @@ def _handle_other_event(policy_key, result_code, card):
     
     # Calculate elapsed first (needed for manual action storage)
     elapsed = 0
-    use_cap = get_config_val(config, DEFAULT_CONFIG, "timer", "use_anki_cap")
-    if use_cap:
+    if config.use_anki_cap:
         try:
             elapsed = card.time_taken() / 1000.0
         except:
@@ -117,9 +143,6 @@ def _handle_other_event(policy_key, result_code, card):
             elapsed = now - session.start_time
 
     # STORE MANUAL ACTION
-    if not hasattr(session, "manual_actions"):
-        session.manual_actions = []
-        
     current_did = mw.col.decks.selected()
         
     session.manual_actions.append({
@@ -132,16 +155,16 @@ def _handle_other_event(policy_key, result_code, card):
     
     # Mark this card as effectively handled (prevent double counting)
     session.last_handled_card_id = card.id
+    snapshot.schedule_save()
+    
+    if session.loading:
+        # Restart the rebuild so the action is merged in
+        load_history(full=True)
+        return
     
     if policy == "acknowledge":
-        # SNAPSHOT BEFORE CHANGE
-        session.history.append((session.current_count, list(session.status_log), list(session.time_log)))
-
-        
-        # APPLY CHANGE
-        session.current_count += 1
-        session.status_log.append(result_code)
-        session.time_log.append(elapsed)
+        # APPLY CHANGE (journaled for undo)
+        session.append_review(result_code, elapsed)
         
         QTimer.singleShot(50, refresh_bar)
 
@@ -150,25 +173,18 @@ def on_undo(action_name=None):
     if mw.state != "review":
         return
     
-    config = mw.addonManager.getConfig(__name__)
-    policy = get_config_val(config, DEFAULT_CONFIG, "undo_policy")
+    policy = current_config().undo_policy
 
-    if policy == "acknowledge":
-        # Check if we have a log to mark
-        if session.status_log:
-            # Mark the last action as undone (grey out)
-            session.status_log[-1] = "undone"
-            
-            if len(session.time_log) == len(session.status_log):
-                session.time_log[-1] = 0
-            # We do NOT pop history or revert 'current' count.
+    if session.loading:
+        # Nothing to revert yet; rebuild from the revlog as it is after the undo
+        load_history(full=True)
+    elif policy == "acknowledge":
+        # Mark the last action as undone (grey out)
+        # We do NOT revert 'current' count.
+        session.mark_last_undone()
     else:
         # Standard Undo: Revert state
-        if session.history:
-            prev_current, prev_log, prev_time = session.history.pop()
-            session.current_count = prev_current
-            session.status_log = prev_log
-            session.time_log = prev_time
+        session.revert_last()
             
     # Reset last action handled so we can re-handle the same card if user retries
     session.last_handled_card_id = None
@@ -176,114 +192,261 @@ def on_undo(action_name=None):
     
     QTimer.singleShot(50, refresh_bar)
 
-def reconstruct_history():
-    # Reset
-    session.current_count = 0
-    session.status_log = []
-    session.time_log = []
-    session.initial_total = None  # Will be set when we calculate the first total
-    
-    # Context
+def deck_tree_ids(did):
+    """The deck and all of its subdecks."""
+    try:
+        return list(mw.col.decks.deck_and_child_ids(did))
+    except AttributeError:
+        # Older Anki
+        return [did] + [child_id for _, child_id in mw.col.decks.children(did)]
+
+def _in_decks_sql(dids):
+    # Cards in filtered decks still belong to their home deck (odid)
+    marks = ",".join("?" * len(dids))
+    return f"(c.did in ({marks}) or c.odid in ({marks}))", list(dids) * 2
+
+def revlog_query(dids, cutoff_ms):
+    """(sql, *args) for today's revlog rows of cards in the given decks, in id order."""
+    deck_sql, deck_args = _in_decks_sql(dids)
+    sql = (
+        "select r.id, r.cid, r.ease, r.time from revlog r "
+        "join cards c on c.id = r.cid "
+        f"where r.id > ? and {deck_sql} "
+        "order by r.id"
+    )
+    return (sql, cutoff_ms, *deck_args)
+
+def card_in_decks(db, cid, dids):
+    """db: the collection's db (col.db of the worker's QueryOp on background loads)."""
+    deck_sql, deck_args = _in_decks_sql(dids)
+    return bool(db.scalar(f"select 1 from cards c where c.id = ? and {deck_sql}", cid, *deck_args))
+
+def _history_context():
+    """(key, dids, cutoff_ms, acknowledge_fails) for the current deck/day/config, or None."""
     did = mw.col.decks.selected()
-    if not did: return
+    if not did: return None
     
-    # Get all cards in current deck tree
+    # Decks in the current tree
     try:
-        valid_cids = set(mw.col.decks.cids(did, children=True))
+        dids = deck_tree_ids(did)
     except:
-        return 
+        return None
     
     # Time boundaries
     cutoff_ms = (mw.col.sched.day_cutoff - 86400) * 1000
     
-    # Query revlog
-    entries = mw.col.db.all(f"select cid, ease, time from revlog where id > {cutoff_ms} order by id")
-    
-    config = mw.addonManager.getConfig(__name__)
-    fail_policy = get_config_val(config, DEFAULT_CONFIG, "fail_policy")
+    ack = current_config().fail_ack
     
-    for (cid, ease, time_ms) in entries:
-        if cid not in valid_cids:
-            # log_debug(f"Skipping cid {cid} - not in current deck")
-            continue
+    # The log is only reusable for the same collection, deck, day and fail policy
+    key = (getattr(mw.col, "path", None), did, cutoff_ms, ack)
+    return key, dids, cutoff_ms, ack
 
-            
+def _fold_entries(entries, ack):
+    """Appends revlog rows (id, cid, ease, time) to the log and advances the cursor."""
+    for (rid, cid, ease, time_ms) in entries:
         is_fail = (ease == 1)
         elapsed = time_ms / 1000.0
         
-        if fail_policy in ["acknowledge", "count"]:
+        if ack:
             # Acknowledge mode: always advance, use actual ease
-            session.status_log.append(ease) 
-            session.time_log.append(elapsed)
-            session.current_count += 1
+            session.append_review(ease, elapsed)
         else:
             # Ignore mode: only advance on pass
             if not is_fail:
-                session.status_log.append(ease)
-                session.time_log.append(elapsed)
-                session.current_count += 1
+                session.append_review(ease, elapsed)
+    if entries:
+        session.last_revlog_id = max(session.last_revlog_id, entries[-1][0])
+
+def load_history(full=False):
+    """Brings the log up to date for the current deck, reading the collection in the background.
+    
+    Only revlog rows newer than the last one folded in are read, unless the deck,
+    day or fail policy changed (or full is set), in which case the log is rebuilt.
+    The bars show a loading state until the result is applied on the main thread.
+    """
+    global _load_token
+    # Any job still running for an earlier request is now stale
+    _load_token += 1
+    token = _load_token
+    
+    ctx = _history_context()
+    if ctx is None:
+        session.reset_log()
+        session.initial_total = None
+        session.history_key = None
+        _set_loading(False)
+        return
+    key, dids, cutoff_ms, ack = ctx
+    
+    if not full and key != session.history_key:
+        # Deck switch: a recently studied deck only needs its revlog tail
+        _switch_log(key)
+    
+    incremental = not full and key == session.history_key
+    since_id = session.last_revlog_id if incremental else cutoff_ms
+    # Manual actions are only merged on a rebuild
+    actions = [] if incremental else list(session.manual_actions)
+    # A rebuild can start from a saved snapshot of this deck (not after sync/forced rebuilds)
+    snap_path = snapshot.snapshot_path(key[1]) if not incremental and not full else None
+    fsrs_did = fsrs_logic.pending_deck_update()
+    
+    _set_loading(True)
+    
+    def op(col):
+        return _fetch_history(col, ctx, since_id, actions, snap_path, fsrs_did)
+    
+    def on_success(result):
+        if token != _load_token:
+            return # Superseded by a newer load (e.g. deck switched again)
+        _apply_history(ctx, incremental, actions, fsrs_did, result)
+    
+    def on_failure(exc):
+        if token == _load_token:
+            _set_loading(False)
+            if session.history_key is None:
+                # _switch_log already parked the previous deck's log; don't keep its total
+                session.initial_total = None
+            # The bars still show the arrays from before the load
+            refresh_bar()
+    
+    run_in_background(op, on_success, on_failure)
 
-                
+def _switch_log(key):
+    """Parks the current deck's log in log_cache and takes out the one for key, if cached."""
+    if session.history_key is not None:
+        # Write the outgoing deck's snapshot while the session still holds it
+        snapshot.flush()
+        old_key = session.history_key
+        log_cache.put((old_key[1], old_key[2]), session.stash_log())
+        session.reset_log()
+        session.history_key = None
+    
+    cached = log_cache.pop((key[1], key[2]))
+    # Same deck and day, but the collection or fail policy may differ
+    if cached is not None and cached.history_key == key:
+        session.adopt_log(cached)
+
+def _set_loading(loading):
+    session.loading = loading
+    layout.set_loading(loading)
 
+def _fetch_history(col, ctx, since_id, actions, snap_path, fsrs_did):
+    """Worker-thread half of load_history: file and collection reads only, no session or UI access."""
+    key, dids, cutoff_ms, ack = ctx
+    
+    # Saved log for this deck and day, if the revlog still agrees with it
+    snap = snapshot.read(snap_path)
+    if snap is not None and not (snap.matches(key[1], cutoff_ms, ack) and snapshot.is_current(snap, col.db)):
+        snap = None
+    if snap is not None:
+        # Only the tail after the snapshot is read
+        since_id = snap.last_revlog_id
+    
+    entries = col.db.all(*revlog_query(dids, since_id))
+    
+    # Legacy actions without a stored DID need a deck tree check
+    legacy_cids = set()
+    if snap is None:
+        for action in actions:
+            if action.get("did") is None and card_in_decks(col.db, action["cid"], dids):
+                legacy_cids.add(action["cid"])
+    
+    retention = fsrs_logic.get_avg_retention(col, fsrs_did) if fsrs_did is not None else None
+    counts = col.sched.counts()
+    return snap, entries, legacy_cids, retention, counts
 
+def _apply_history(ctx, incremental, actions, fsrs_did, result):
+    """Main-thread half of load_history: swaps the fetched rows into the session in one go."""
+    snap, entries, legacy_cids, retention, counts = result
+    key, dids, cutoff_ms, ack = ctx
+    
+    # FSRS intervals first, so the bar is evaluated with the deck's weights/intervals
+    if fsrs_did is not None:
+        fsrs_logic.apply_deck_retention(fsrs_did, retention)
+    
+    if snap is not None:
+        # Saved log already has its manual actions merged in
+        snapshot.restore(snap)
+        actions = []
+    elif not incremental:
+        # Reset
+        session.reset_log()
+        session.last_revlog_id = cutoff_ms
+    session.initial_total = None  # Will be set when we calculate the first total
+    
+    _fold_entries(entries, ack)
+    session.history_key = key
+    
     # MERGE MANUAL ACTIONS
     # If recent manual actions are missing from DB (revlog), add them now.
-    if hasattr(session, "manual_actions") and session.manual_actions:
-        # Get IDs found in DB
-        db_cids = set(x[0] for x in entries)
+    if actions:
+        _merge_manual_actions(entries, key[1], actions, legacy_cids)
+    
+    _set_loading(False)
+    refresh_bar(counts)
+
+def _merge_manual_actions(entries, did, actions, legacy_cids):
+    """Appends manual bury/suspend actions that have no matching revlog row.
+    
+    legacy_cids are the cards of actions without a stored DID that are in the deck tree.
+    Actions whose policy is "ignore" are skipped, like on_bury/on_suspend skip them live.
+    A revlog row matches an action on the same card if its id (a ms
+    timestamp) lies within MANUAL_MATCH_WINDOW_MS of the action time.
+    Revlog ids are indexed per card once, so this is O((M + E) log E).
+    """
+    # Filter manual actions that are relevant to current session/deck
+    config = current_config()
+    relevant = []
+    for action in actions:
+        policy_key = MANUAL_ACTION_POLICIES.get(status_code(action["type"]))
+        if policy_key is not None and config.policy(policy_key) == "ignore":
+            continue
+        action_did = action.get("did")
         
-        # Filter manual actions that are relevant to current session/deck
-        for action in session.manual_actions:
-            cid = action["cid"]
-            action_did = action.get("did")
-            
-            # If we have a stored DID, use it to verify session match
-            # Otherwise fall back to valid_cids check (legacy/safeguard)
-            if action_did is not None:
-                if action_did != did:
-                    continue
-            elif cid not in valid_cids:
-                # Fallback if did not missing (shouldn't happen with new code)
+        # If we have a stored DID, use it to verify session match
+        # Otherwise fall back to a deck tree check (legacy/safeguard)
+        if action_did is not None:
+            if action_did != did:
                 continue
-                
-            # Check if this card appeared in DB results recently?
-            # Revlog doesn't easily map back to "this specific action" without timestamp match.
-            # But "buried" usually doesn't create duplicate logs quickly.
-            # If the card is NOT in the DB entries we just fetched (for today), we assume it's missing.
-            # OR if it IS in DB, we assume DB covered it?
-            # Issue: User might review card (DB OK) then Bury it (DB Missing).
-            # So simple existence of CID in revlog isn't enough.
-            # We need to know if the LATEST action is there.
-            
-            # Simple heuristic: If the action time is > last DB entry time for this CID?
-            # Or just append if not found?
-            
-            # Use strict timestamp check?
-            # Action time is seconds. Revlog is ms.
-            action_ts_ms = action["time"] * 1000
-            
-            # Did we find an entry for this CID with similar timestamp?
-            # allowed skew: 2 seconds
-            found_in_db = False
-            for (dcid, dease, dtime) in entries:
-                if dcid == cid:
-                    if abs(dtime - action_ts_ms) < 5000: # 5 seconds window
-                         found_in_db = True
-                         break
-            
-            if not found_in_db:
-                session.status_log.append(action['type'])
-                session.time_log.append(action['elapsed'])
-                session.current_count += 1
+        elif action["cid"] not in legacy_cids:
+            # Fallback if did not missing (shouldn't happen with new code)
+            continue
+        relevant.append(action)
+    if not relevant:
+        return
+    
+    # Sorted revlog ids per card, only for cards with manual actions
+    # (entries are already in id order)
+    wanted = {action["cid"] for action in relevant}
+    ids_by_cid = {}
+    for (rid, cid, ease, time_ms) in entries:
+        if cid in wanted:
+            ids_by_cid.setdefault(cid, []).append(rid)
+    
+    for action in relevant:
+        # Action time is seconds, revlog ids are ms
+        action_ts_ms = action["time"] * 1000
+        found_in_db = False
+        rids = ids_by_cid.get(action["cid"])
+        if rids:
+            # Nearest revlog ids on either side of the action time
+            pos = bisect_left(rids, action_ts_ms)
+            for near in rids[max(0, pos - 1):pos + 1]:
+                if abs(near - action_ts_ms) < MANUAL_MATCH_WINDOW_MS:
+                    found_in_db = True
+                    break
+        
+        if not found_in_db:
+            session.append_review(action['type'], action['elapsed'])
 
 
 
 
 def on_state_change(new_state, old_state):
     # FSRS Per-Deck Hook (running on overview/review entry)
-    # MUST run before reconstruct_history to ensure correct weights/intervals
-    if new_state in ["overview", "review"]:
-        fsrs_logic.check_fsrs_deck_update()
+    # On review entry it is part of load_history, applied before the log is shown
+    if new_state == "overview":
+        fsrs_logic.check_fsrs_deck_update_in_background()
 
     # Show only in reviewer
     if new_state == "review":
@@ -293,8 +456,7 @@ def on_state_change(new_state, old_state):
         session.was_answered = False
         session.last_handled_card_id = None
         
-        reconstruct_history()
-        QTimer.singleShot(50, refresh_bar)
+        load_history()
         if layout.chunk_widget: 
             layout.chunk_widget.show()
             layout.chunk_widget.update()
@@ -304,20 +466,30 @@ def on_state_change(new_state, old_state):
     elif new_state == "overview":
         if layout.chunk_widget: layout.chunk_widget.hide()
         if layout.card_widget: layout.card_widget.hide()
+    
+    # Live timers only tick in the reviewer
+    ticker.reschedule()
 
 def on_sync_finished():
+    # Synced reviews can have ids below our cursor, so no log can be patched
+    session.history_key = None
+    log_cache.clear()
     if mw.state == "review":
-        reconstruct_history()
-        QTimer.singleShot(50, refresh_bar)
+        load_history(full=True)
 
-def refresh_bar():
+def refresh_bar(counts=None, config=None):
+    """Pushes the session to the widgets. counts: sched.counts() if already fetched,
+    config: settings to apply if not yet saved (live preview)."""
     if not mw.col:
         return
+    if session.loading:
+        return # The pending load refreshes once it is applied
         
-    counts = mw.col.sched.counts()
-    config = mw.addonManager.getConfig(__name__)
+    if counts is None:
+        counts = mw.col.sched.counts()
+    config = AddonConfig(config) if config is not None else current_config()
     
-    if get_config_val(config, DEFAULT_CONFIG, "double_new"):
+    if config.double_new:
         remaining = (counts[0] * 2) + counts[1] + counts[2]
     else:
         remaining = sum(counts)
@@ -327,18 +499,23 @@ def refresh_bar():
     # Set initial_total on first call
     # For excess calculation, initial_total should be number of UNIQUE cards, not total reviews
     if session.initial_total is None:
-        # Count failed cards in status_log (when fail_policy is acknowledge/count)
-        fail_policy = get_config_val(config, DEFAULT_CONFIG, "fail_policy")
-        if fail_policy in ["acknowledge", "count"]:
-            # Count fails (ease == 1 or False)
-            num_fails = sum(1 for ease in session.status_log if ease == 1 or ease == False)
+        # Count failed cards in status_log (when fail_policy is acknowledge)
+        if config.fail_ack:
+            # Count fails (status code, C-level scan of the array)
+            num_fails = session.status_log.count(STATUS_AGAIN)
             # Initial total = current total - number of fails (since fails are re-reviews, not unique cards)
             session.initial_total = total - num_fails
         else:
             # No fail tracking, initial equals current
             session.initial_total = total
     
-    layout.refresh_widgets(total, session.current_count, session.status_log, session.time_log, session.start_time, session.initial_total)
+    # Keep the per-chunk index on the configured chunk size
+    session.set_chunk_size(config.chunk_size)
+    
+    # Persist once the session goes idle
+    snapshot.schedule_save()
+    
+    layout.refresh_widgets(total, session.current_count, session.status_log, session.time_log, session.start_time, session.initial_total, session.chunks, session.time_prefix)
 
 
 
@@ -0,0 +1,312 @@
+import math
+from bisect import bisect_right
+from types import MappingProxyType
+from aqt.qt import *
+from .config_utils import get_config_val
+from .text_cache import text_cache
+
+# Compiled, read-only view of the user config used by ProgressBarWidget.paintEvent.
+# update_config builds one of these per settings change so painting never walks
+# the nested config dicts or re-creates QColor/QPen/QFont objects.
+
+# Text "type" modes
+TYPE_UNKNOWN = -1
+TYPE_CHUNKS = 0
+TYPE_CARDS = 1
+TYPE_RELATIVE = 2
+TYPE_ABSOLUTE = 3
+TYPE_TOTAL = 4
+
+_TYPE_CODES = {
+    "chunks": TYPE_CHUNKS,
+    "cards": TYPE_CARDS,
+    "relative": TYPE_RELATIVE,
+    "absolute": TYPE_ABSOLUTE,
+    "total": TYPE_TOTAL,
+}
+
+# Text "count_direction" modes
+DIR_UNKNOWN = -1
+DIR_DONE = 0 # "done" / "passed"
+DIR_REMAINING = 1
+DIR_DONE_TOTAL = 2 # "done/total" / "done/remaining"
+DIR_REMAINING_TOTAL = 3 # "remaining/total" / "remaining/done"
+
+_DIR_CODES = {
+    "done": DIR_DONE,
+    "passed": DIR_DONE,
+    "remaining": DIR_REMAINING,
+    "done/total": DIR_DONE_TOTAL,
+    "done/remaining": DIR_DONE_TOTAL,
+    "remaining/total": DIR_REMAINING_TOTAL,
+    "remaining/done": DIR_REMAINING_TOTAL,
+}
+
+# 1e-9 to prevent floating point issues (e.g. 2.99999999 < 3.0)
+EPSILON = 1e-9
+
+TEXT_SCALE = 0.75 # Font pixel size relative to bar height
+OUTLINE_WIDTH = 3
+
+
+class _Frozen:
+    """Slotted record that refuses attribute writes after construction."""
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for key, value in fields.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+
+class TextStyle(_Frozen):
+    __slots__ = ("color", "brush", "bold", "outline", "outline_pen", "font", "metrics", "fonts")
+
+    def font_for(self, rect_height):
+        """(QFont, QFontMetrics) sized for a text rect of the given height."""
+        pair = self.fonts.get(rect_height)
+        if pair is None:
+            pair = _make_font(self.font, rect_height, self.bold)
+        return pair
+
+    def width(self, text):
+        """Advance width of text in the bar-height font (cached per label)."""
+        return text_cache.width(text, self.font, self.metrics)
+
+
+class TextSlot(_Frozen):
+    __slots__ = ("enabled", "type", "direction", "show_decimals", "decimals", "style")
+
+
+class TimerConf(_Frozen):
+    __slots__ = ("enabled", "live", "minutes", "seconds", "milliseconds", "style")
+
+
+class BarText(_Frozen):
+    __slots__ = ("numbers", "percentages", "bar_numbers", "bar_percentages")
+
+
+class Interval(_Frozen):
+    __slots__ = ("start", "end", "start_closed", "end_closed", "color_key", "pattern_key")
+
+
+class IntervalClassifier(_Frozen):
+    """Chunk score -> (color, pattern color) as a sorted cut table.
+
+    Every comparison in the interval scan flips at one exact float, so the
+    scan's result is constant between consecutive cuts and a bisect gives
+    the same answer as running the scan.
+    """
+    __slots__ = ("cuts", "results")
+
+    def classify(self, avg):
+        return self.results[bisect_right(self.cuts, avg)]
+
+
+class RenderConfig(_Frozen):
+    __slots__ = (
+        "chunk_size", "bar_height", "fail_ack",
+        "highlight_excess", "striped_again", "auto_hide", "use_good_for_all_pass",
+        "w_again", "w_hard", "w_good", "w_easy", "intervals", "classifier",
+        "colors", "top", "bottom", "chunk_timer", "card_timer", "live",
+    )
+
+
+def _make_font(base_font, rect_height, bold):
+    font = QFont(base_font)
+    font.setPixelSize(int(rect_height * TEXT_SCALE))
+    font.setBold(bold)
+    return font, QFontMetrics(font)
+
+
+def scan_intervals(intervals, colors, avg):
+    """Reference linear scan over the enabled intervals (as done per chunk originally)."""
+    final_color = colors["good"]
+    pattern_color = None
+    for iv in intervals:
+        # Check logic with epsilon safety
+        if iv.start_closed:
+            match_start = (avg >= iv.start - EPSILON)
+        else:
+            match_start = (avg > iv.start + EPSILON)
+            
+        if iv.end_closed:
+            match_end = (avg <= iv.end + EPSILON)
+        else:
+            match_end = (avg < iv.end - EPSILON)
+        
+        if match_start and match_end:
+            # Found match - don't break yet, better ones might match too!
+            # Since we go top-down (Again -> Easy), later equals better.
+            final_color = colors.get(iv.color_key, colors["good"])
+            if iv.pattern_key:
+                pattern_color = colors.get(iv.pattern_key, None)
+            # NO break - allow Easy/Good to override Hard/Again if both match (e.g. at boundary)
+        
+        # Optimization: if after our score range, we can stop
+        if iv.start > avg + EPSILON:
+            break
+    return final_color, pattern_color
+
+
+def _break_cut(start):
+    """Smallest avg for which `start > avg + EPSILON` is False."""
+    cut = start - EPSILON
+    while start > cut + EPSILON:
+        cut = math.nextafter(cut, math.inf)
+    while not (start > math.nextafter(cut, -math.inf) + EPSILON):
+        cut = math.nextafter(cut, -math.inf)
+    return cut
+
+
+def compile_classifier(intervals, colors):
+    # Each cut is the first float at which one comparison changes outcome
+    cuts = set()
+    for iv in intervals:
+        if iv.start_closed:
+            cuts.add(iv.start - EPSILON)
+        else:
+            cuts.add(math.nextafter(iv.start + EPSILON, math.inf))
+        if iv.end_closed:
+            cuts.add(math.nextafter(iv.end + EPSILON, math.inf))
+        else:
+            cuts.add(iv.end - EPSILON)
+        cuts.add(_break_cut(iv.start))
+    cuts = sorted(cuts)
+    
+    # results[k] holds for cuts[k-1] <= avg < cuts[k]
+    if cuts:
+        samples = [math.nextafter(cuts[0], -math.inf)] + cuts
+    else:
+        samples = [0.0]
+    results = tuple(scan_intervals(intervals, colors, x) for x in samples)
+    return IntervalClassifier(cuts=tuple(cuts), results=results)
+
+
+def _type_code(value):
+    return _TYPE_CODES.get(value, TYPE_UNKNOWN)
+
+
+def _dir_code(value):
+    return _DIR_CODES.get(value, DIR_UNKNOWN)
+
+
+def compile_render_config(config, default_config, base_font, bar_height):
+    """Flatten user+default config into a RenderConfig for the given font and bar height."""
+    def get(*keys):
+        return get_config_val(config, default_config, *keys)
+
+    # Fallbacks for individual style keys (shared by every text element)
+    def_color = get("text_options", "top", "numbers", "style", "color")
+    def_bold = get("text_options", "top", "numbers", "style", "bold")
+    def_outline = get("text_options", "top", "numbers", "style", "outline")
+    def_outline_color = get("text_options", "top", "numbers", "style", "outline_color")
+
+    def make_style(style_conf):
+        style_conf = style_conf or {}
+        color = QColor(style_conf.get("color", def_color))
+        bold = bool(style_conf.get("bold", def_bold))
+        outline = bool(style_conf.get("outline", def_outline))
+        outline_pen = QPen(QColor(style_conf.get("outline_color", def_outline_color)))
+        outline_pen.setWidth(OUTLINE_WIDTH)
+        # Measuring uses the full bar height, cells are drawn 1px shorter
+        fonts = {h: _make_font(base_font, h, bold) for h in (bar_height, bar_height - 1)}
+        font, metrics = fonts[bar_height]
+        return TextStyle(
+            color=color,
+            brush=QBrush(color),
+            bold=bold,
+            outline=outline,
+            outline_pen=outline_pen,
+            font=font,
+            metrics=metrics,
+            fonts=MappingProxyType(fonts),
+        )
+
+    def make_slot(key, name):
+        dec = get("text_options", key, name, "decimals")
+        return TextSlot(
+            enabled=bool(get("text_options", key, name, "enabled")),
+            type=_type_code(get("text_options", key, name, "type")),
+            # Bar numbers default to "remaining" if unset
+            direction=_dir_code(get("text_options", key, name, "count_direction") or ("remaining" if name == "bar_numbers" else None)),
+            show_decimals=bool(get("text_options", key, name, "show_decimals")),
+            decimals=int(dec) if dec is not None else 0,
+            style=make_style(get("text_options", key, name, "style")),
+        )
+
+    def make_bar_text(key):
+        return BarText(
+            numbers=make_slot(key, "numbers"),
+            percentages=make_slot(key, "percentages"),
+            bar_numbers=make_slot(key, "bar_numbers"),
+            bar_percentages=make_slot(key, "bar_percentages"),
+        )
+
+    top = make_bar_text("top")
+    bottom = make_bar_text("bottom")
+
+    def make_timer(name):
+        return TimerConf(
+            enabled=bool(get("timer", name, "enabled")),
+            live=bool(get("timer", name, "live_enabled")),
+            minutes=bool(get("timer", name, "format", "minutes")),
+            seconds=bool(get("timer", name, "format", "seconds")),
+            milliseconds=bool(get("timer", name, "format", "milliseconds")),
+            style=make_style(get("timer", name, "style")),
+        )
+
+    chunk_timer = make_timer("chunk_timer")
+    card_timer = make_timer("card_timer")
+
+    # Colors: defaults first, then user overrides (ensures newer keys exist)
+    colors = {}
+    for source in (default_config.get("colors", {}), get("colors") or {}):
+        for key, hex_val in source.items():
+            if hex_val:
+                colors[key] = QColor(hex_val)
+
+    # Config is normalised (see config_schema), so interval entries are complete
+    weights = get("chunk_evaluation", "weights")
+    intervals = []
+    for iv in get("chunk_evaluation", "intervals"):
+        if not iv["enabled"]:
+            continue
+        intervals.append(Interval(
+            start=iv["start_val"],
+            end=iv["end_val"],
+            start_closed=iv["start_bracket"] == "[",
+            end_closed=iv["end_bracket"] == "]",
+            color_key=iv["color_key"],
+            pattern_key=iv["pattern_key"],
+        ))
+
+    intervals = tuple(intervals)
+    colors = MappingProxyType(colors)
+
+    return RenderConfig(
+        chunk_size=get("chunk_size"),
+        bar_height=bar_height,
+        fail_ack=get("fail_policy") == "acknowledge",
+        highlight_excess=bool(get("visual_options", "highlight_excess")),
+        striped_again=bool(get("visual_options", "striped_again")),
+        auto_hide=bool(get("visual_options", "auto_hide_text")),
+        use_good_for_all_pass=bool(get("visual_options", "use_good_for_all_pass")),
+        w_again=weights["again"],
+        w_hard=weights["hard"],
+        w_good=weights["good"],
+        w_easy=weights["easy"],
+        intervals=intervals,
+        classifier=compile_classifier(intervals, colors),
+        colors=colors,
+        top=top,
+        bottom=bottom,
+        chunk_timer=chunk_timer,
+        card_timer=card_timer,
+        live=chunk_timer.live or card_timer.live,
+    )
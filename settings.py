@@ -1,11 +1,11 @@
 
 from aqt.qt import *
-from aqt import mw
 
 from . import progressbar
 from . import fsrs_logic
 import copy
-from .config_utils import DEFAULT_CONFIG, get_config_val
+from .config_utils import get_config_val, get_defaults, thaw
+from .config_schema import write_config
 
 class NoScrollComboBox(QComboBox):
     def wheelEvent(self, event):
@@ -19,20 +19,30 @@ class NoScrollDoubleSpinBox(QDoubleSpinBox):
     def wheelEvent(self, event):
         event.ignore()
 
+PREVIEW_DELAY_MS = 16 # About one frame
+
 class SettingsDialog(QDialog):
     def __init__(self, parent, config):
         super().__init__(parent)
         self.config = copy.deepcopy(config)
         
-        # Ensure DEFAULT_CONFIG is fresh from disk
-        from .config_utils import reload_defaults
-        self.default_config = copy.deepcopy(reload_defaults())
+        # Editable copy of the shared defaults (re-read only if config.json changed);
+        # reset buttons copy values from it into self.config
+        self.default_config = thaw(get_defaults())
         
         self.original_config = copy.deepcopy(config) # Backup for Cancel
-        self.colours = self.config.get("colors", self.default_config.get("colors", {})) 
+        self.colours = self.config["colors"]
         self.style_widgets = {}
         self.setWindowTitle("Progress Bar Settings")
         
+        # Live preview: widget changes are coalesced into one push per frame.
+        # Nothing is written to disk until accept()
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.push_preview)
+        self.previewed = False
+        
         self.setup_ui()
         
         # Connect signals after UI is fully built
@@ -689,8 +699,10 @@ class SettingsDialog(QDialog):
             self.live_update_handler()
 
     def reject(self):
-        # Restore original config on Cancel
-        mw.addonManager.writeConfig(__name__, self.original_config)
+        # Cancel: nothing was saved, only put the bars back to the original config
+        self.preview_timer.stop()
+        if self.previewed and hasattr(self, "live_callback"):
+            self.live_callback(copy.deepcopy(self.original_config))
         super().reject()
 
     def connect_live_preview(self):
@@ -880,8 +892,7 @@ class SettingsDialog(QDialog):
         
         # Colour
         def_colours = self.default_config["colors"]
-        # Fallback to config.json default
-        pc = (def_colours.get("perfect_color") or vis_opts["perfect_color"]).upper()
+        pc = def_colours["perfect_color"].upper()
         self.colours["perfect_color"] = pc
         if "perfect_color" in self.colour_btns:
             self.colour_btns["perfect_color"].setText(pc)
@@ -1019,7 +1030,7 @@ class SettingsDialog(QDialog):
             row_l.addWidget(end_bk)
             
             # Colour Indication
-            # Labels and keys should ALWAYS come from the standardized sequence in DEFAULT_CONFIG
+            # Labels and keys should ALWAYS come from the standardized sequence in config.json
             ck = def_iv.get("color_key", "good")
             pk = def_iv.get("pattern_key", None)
             lbl_txt = ck.capitalize()
@@ -1296,13 +1307,18 @@ class SettingsDialog(QDialog):
         self.live_update_handler()
 
     def live_update_handler(self):
-        # Gather current state and write to config (live)
+        # Gather current state into self.config (in memory) and schedule a preview.
+        # Bursts of changes (spinbox steps, update_intervals_logic) restart the
+        # timer, so the bars refresh once with the final values
         self.update_config_from_ui()
-        mw.addonManager.writeConfig(__name__, self.config)
-        
-        # Direct callback for immediate updates (bypassing addonManager hooks if needed)
+        self.preview_timer.start()
+
+    def push_preview(self):
+        # Direct callback with a snapshot, the dialog keeps editing self.config
+        self.preview_timer.stop()
         if hasattr(self, "live_callback"):
-            self.live_callback(self.config)
+            self.live_callback(copy.deepcopy(self.config))
+            self.previewed = True
 
     def update_config_from_ui(self):
         # Central logic to scrape UI to self.config
@@ -1326,14 +1342,12 @@ class SettingsDialog(QDialog):
         self.config["undo_policy"] = self.undo_policy_cb.currentText()
         self.config["colors"] = self.colours
         
-        def_vis = self.default_config.get("visual_options", {})
         self.config["visual_options"] = {
             "highlight_excess": self.highlight_excess_cb.isChecked(),
             "auto_hide_text": self.auto_hide_cb.isChecked(),
             "use_good_for_all_pass": self.use_good_as_pass_cb.isChecked(),
             "highlight_perfect": self.highlight_perfect_cb.isChecked(),
-            "perfect_include_hard": self.perfect_include_hard_cb.isChecked(),
-            "perfect_color": self.colours.get("perfect_color", def_vis["perfect_color"])
+            "perfect_include_hard": self.perfect_include_hard_cb.isChecked()
         }
         
         def build_conf(widgets):
@@ -1517,7 +1531,9 @@ class SettingsDialog(QDialog):
         self.live_update_handler()
 
     def accept(self):
-        # Final save (redundant if live update is on, but safe)
-        self.live_update_handler()
+        # Single save of the edited config, then apply any pending preview
+        self.update_config_from_ui()
+        self.config = write_config(self.config)
+        self.push_preview()
         super().accept()
 
@@ -0,0 +1,183 @@
+import json
+import os
+import re
+import struct
+import sys
+from array import array
+from aqt import mw
+from aqt.qt import QTimer
+from .state import session, encode_status_log, encode_time_log
+
+# On-disk snapshot of the session log, one file per profile and deck in user_files.
+# Lets a restart mid-day restore the log (and manual actions that never reached
+# the revlog) instead of rescanning today's revlog.
+#
+# Layout (little-endian):
+#   header   (see _HEADER)
+#   status   n x int8   STATUS_* codes
+#   times    n x double seconds
+#   actions  UTF-8 JSON list of manual action dicts
+
+MAGIC = b"BPBS"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<4sBBqqqqII") # magic, version, ack, did, cutoff_ms, last_revlog_id, revlog_rows, n, actions_len
+
+SAVE_DELAY_MS = 2000 # Write once the session has been idle this long
+
+_save_timer = None
+
+
+class Snapshot:
+    __slots__ = ("did", "cutoff_ms", "ack", "last_revlog_id", "revlog_rows", "status_log", "time_log", "manual_actions")
+
+    def __init__(self, did, cutoff_ms, ack, last_revlog_id, revlog_rows, status_log, time_log, manual_actions):
+        self.did = did
+        self.cutoff_ms = cutoff_ms
+        self.ack = ack
+        self.last_revlog_id = last_revlog_id
+        self.revlog_rows = revlog_rows # Revlog rows (all decks) in (cutoff_ms, last_revlog_id]
+        self.status_log = status_log
+        self.time_log = time_log
+        self.manual_actions = manual_actions
+
+    def matches(self, did, cutoff_ms, ack):
+        """Same deck, same day and same fail policy as the log about to be loaded."""
+        return self.did == did and self.cutoff_ms == cutoff_ms and self.ack == ack
+
+
+def encode(snap):
+    times = array("d", snap.time_log)
+    if sys.byteorder == "big":
+        times.byteswap()
+    actions = json.dumps(snap.manual_actions, separators=(",", ":")).encode("utf-8")
+    header = _HEADER.pack(MAGIC, SNAPSHOT_VERSION, int(snap.ack), snap.did, snap.cutoff_ms,
+                          snap.last_revlog_id, snap.revlog_rows, len(snap.status_log), len(actions))
+    return b"".join((header, snap.status_log.tobytes(), times.tobytes(), actions))
+
+
+def decode(data):
+    """Snapshot from encode() bytes, or None if truncated or from another version."""
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, ack, did, cutoff_ms, last_revlog_id, revlog_rows, n, actions_len = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != SNAPSHOT_VERSION:
+        return None
+    if len(data) != _HEADER.size + n * 9 + actions_len:
+        return None
+
+    pos = _HEADER.size
+    status_log = array("b")
+    status_log.frombytes(data[pos:pos + n])
+    pos += n
+    time_log = array("d")
+    time_log.frombytes(data[pos:pos + n * 8])
+    if sys.byteorder == "big":
+        time_log.byteswap()
+    pos += n * 8
+    try:
+        manual_actions = json.loads(data[pos:].decode("utf-8"))
+    except ValueError:
+        return None
+    return Snapshot(did, cutoff_ms, bool(ack), last_revlog_id, revlog_rows, status_log, time_log, manual_actions)
+
+
+def snapshot_path(did):
+    """user_files/session-<profile>-<deck>.bin, or None without a profile."""
+    try:
+        profile = mw.pm.name
+        folder = os.path.join(mw.addonManager.addonsFolder(mw.addonManager.addonFromModule(__name__)), "user_files")
+    except:
+        return None
+    if not profile:
+        return None
+    safe = re.sub(r"[^\w.-]", "_", profile)
+    return os.path.join(folder, f"session-{safe}-{did}.bin")
+
+
+def read(path):
+    """Snapshot stored at path, or None. Safe to call off the main thread."""
+    if not path:
+        return None
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    try:
+        return decode(data)
+    except struct.error:
+        return None
+
+
+def count_revlog_rows(db, cutoff_ms, last_revlog_id):
+    # Primary key range count, no join
+    return db.scalar("select count() from revlog where id > ? and id <= ?", cutoff_ms, last_revlog_id) or 0
+
+
+def is_current(snap, db):
+    """The revlog up to the snapshot's high-water mark is unchanged.
+
+    The mark row must still exist and no rows may have appeared below it
+    (synced in) or disappeared since the snapshot was taken.
+    """
+    if snap.last_revlog_id > snap.cutoff_ms:
+        if not db.scalar("select 1 from revlog where id = ?", snap.last_revlog_id):
+            return False
+    return count_revlog_rows(db, snap.cutoff_ms, snap.last_revlog_id) == snap.revlog_rows
+
+
+def restore(snap):
+    """Loads a validated snapshot into the session. Manual actions are merged, not replaced."""
+    session.restore_log(snap.status_log, snap.time_log)
+    session.last_revlog_id = snap.last_revlog_id
+
+    known = {(a["cid"], a["time"]) for a in session.manual_actions}
+    for action in snap.manual_actions:
+        if (action["cid"], action["time"]) not in known:
+            session.manual_actions.append(action)
+
+
+def save_now():
+    """Writes the current session log of its deck (tmp file + atomic replace)."""
+    key = session.history_key
+    if key is None or session.loading:
+        return
+    _, did, cutoff_ms, ack = key
+    path = snapshot_path(did)
+    if not path or not mw.col:
+        return
+
+    try:
+        revlog_rows = count_revlog_rows(mw.col.db, cutoff_ms, session.last_revlog_id)
+    except:
+        return
+    snap = Snapshot(
+        did, cutoff_ms, ack, session.last_revlog_id, revlog_rows,
+        encode_status_log(session.status_log), encode_time_log(session.time_log),
+        [a for a in session.manual_actions if a.get("did") in (did, None)],
+    )
+    tmp = path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(encode(snap))
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def schedule_save():
+    """(Re)starts the idle timer; the snapshot is written once changes stop coming in."""
+    global _save_timer
+    if _save_timer is None:
+        _save_timer = QTimer()
+        _save_timer.setSingleShot(True)
+        _save_timer.timeout.connect(save_now)
+    _save_timer.start(SAVE_DELAY_MS)
+
+
+def flush():
+    """Writes a pending snapshot immediately (profile close)."""
+    if _save_timer is not None and _save_timer.isActive():
+        _save_timer.stop()
+        save_now()
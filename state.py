@@ -1,22 +1,322 @@
+from array import array
+from collections import OrderedDict
 
 # Stores the session state for the addon
 # This centralized object replaces the global variables previously in __init__.py
 
+# Status codes stored in SessionState.status_log (array('b'))
+# 1-4 are the answer eases as written to the revlog.
+STATUS_SUSPENDED = -3
+STATUS_BURIED = -2
+STATUS_UNDONE = -1
+STATUS_OTHER = 0 # Anything else (e.g. manual reschedule, ease 0) - counts as a pass
+STATUS_AGAIN = 1
+STATUS_HARD = 2
+STATUS_GOOD = 3
+STATUS_EASY = 4
+
+_LEGACY_STATUS = {
+    "undone": STATUS_UNDONE,
+    "buried": STATUS_BURIED,
+    "suspended": STATUS_SUSPENDED,
+}
+
+def status_code(value):
+    """Maps a legacy status value (bool, ease int or string) to its status code."""
+    if value is True:
+        return STATUS_GOOD
+    if value is False:
+        return STATUS_AGAIN
+    if isinstance(value, str):
+        return _LEGACY_STATUS.get(value, STATUS_OTHER)
+    if isinstance(value, int) and STATUS_SUSPENDED <= value <= STATUS_EASY:
+        return value
+    return STATUS_OTHER
+
+def encode_status_log(values):
+    """One-time migration of a legacy status list into a compact array('b')."""
+    if isinstance(values, array) and values.typecode == "b":
+        return values
+    return array("b", (status_code(v) for v in values))
+
+def encode_time_log(values):
+    if isinstance(values, array) and values.typecode == "d":
+        return values
+    return array("d", values)
+
+def prefix_sums(time_log):
+    """Running totals: prefix[i] is the time of the first i reviews (len(time_log) + 1 entries)."""
+    prefix = array("d", [0.0])
+    total = 0.0
+    for elapsed in time_log:
+        total += elapsed
+        prefix.append(total)
+    return prefix
+
+def span_time(prefix, start, end):
+    """Seconds spent on reviews [start, end) of the log. O(1); end is clamped to the log."""
+    end = min(end, len(prefix) - 1)
+    if end <= start:
+        return 0.0
+    return prefix[end] - prefix[start]
+
+# Slot layout for per-chunk status counts
+_SLOT_OFFSET = -STATUS_SUSPENDED # status code -> slot index
+_N_SLOTS = STATUS_EASY - STATUS_SUSPENDED + 1
+_ZERO_SLOTS = array("i", [0] * _N_SLOTS)
+
+class ChunkAggregates:
+    """Per-chunk status counts, kept in step with the session log.
+
+    Updated in O(1) on append, undone mark and revert, so painting a chunk
+    never has to rescan its slice of the log. `generation` changes whenever
+    an existing entry is modified (anything but an append).
+    """
+    __slots__ = ("chunk_size", "counts", "sizes", "generation")
+
+    def __init__(self, chunk_size):
+        self.chunk_size = max(1, chunk_size)
+        self.counts = array("i") # _N_SLOTS counts per chunk, flattened
+        self.sizes = array("i") # Reviews per chunk
+        self.generation = 0
+
+    @classmethod
+    def from_log(cls, chunk_size, status_log):
+        agg = cls(chunk_size)
+        for index, code in enumerate(status_log):
+            agg.add(index, code)
+        return agg
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def _ensure(self, chunk):
+        while len(self.sizes) <= chunk:
+            self.counts.extend(_ZERO_SLOTS)
+            self.sizes.append(0)
+
+    def add(self, index, code):
+        chunk = index // self.chunk_size
+        self._ensure(chunk)
+        self.counts[chunk * _N_SLOTS + code + _SLOT_OFFSET] += 1
+        self.sizes[chunk] += 1
+
+    def remove(self, index, code):
+        chunk = index // self.chunk_size
+        self.generation += 1
+        self.counts[chunk * _N_SLOTS + code + _SLOT_OFFSET] -= 1
+        self.sizes[chunk] -= 1
+
+    def replace(self, index, old_code, new_code):
+        chunk = index // self.chunk_size
+        self.generation += 1
+        base = chunk * _N_SLOTS + _SLOT_OFFSET
+        self.counts[base + old_code] -= 1
+        self.counts[base + new_code] += 1
+
+    def count(self, chunk, code):
+        if chunk >= len(self.sizes):
+            return 0
+        return self.counts[chunk * _N_SLOTS + code + _SLOT_OFFSET]
+
+    def size(self, chunk):
+        return self.sizes[chunk] if chunk < len(self.sizes) else 0
+
+    def score_sum(self, chunk, w_again, w_hard, w_good, w_easy):
+        """Weighted score of a chunk. Undone counts as again, anything unlisted as good."""
+        n = self.size(chunk)
+        if not n:
+            return 0.0
+        base = chunk * _N_SLOTS + _SLOT_OFFSET
+        counts = self.counts
+        again = counts[base + STATUS_AGAIN] + counts[base + STATUS_UNDONE]
+        hard = counts[base + STATUS_HARD]
+        easy = counts[base + STATUS_EASY]
+        return again * w_again + hard * w_hard + easy * w_easy + (n - again - hard - easy) * w_good
+
+# Undo journal entry kinds
+JOURNAL_APPEND = 0 # A review was appended to the log
+JOURNAL_UNDONE = 1 # The last review was marked "undone" (acknowledge undo)
+
+_APPEND_ENTRY = (JOURNAL_APPEND,)
+
 class SessionState:
+    __slots__ = (
+        "history", "last_deck_id", "status_log", "time_log", "time_prefix", "start_time",
+        "current_count", "initial_total", "manual_actions", "chunks",
+        "history_key", "last_revlog_id", "loading",
+        "last_card_id", "was_answered", "last_action_handled", "last_handled_card_id",
+    )
+
     def __init__(self):
-        self.history = [] # Stores (current_count, status_log_list, time_log_list) snapshots
+        self.history = [] # Undo journal: (JOURNAL_APPEND,) or (JOURNAL_UNDONE, prev_status, prev_time)
         self.last_deck_id = None # For FSRS tracking
-        self.status_log = [] # True=Pass, False/1=Fail
-        self.time_log = [] # Float seconds
+        self.status_log = array("b") # STATUS_* codes, one per review
+        self.time_log = array("d") # Float seconds
+        self.time_prefix = prefix_sums(()) # Running totals of time_log (see span_time)
+        self.chunks = ChunkAggregates(10) # Per-chunk index over the log (see set_chunk_size)
         self.start_time = 0
         self.current_count = 0
         self.initial_total = None # Original total at session start (for excess calculation)
-        
+        self.manual_actions = [] # Bury/suspend actions that may not reach the revlog
+        self.history_key = None # (collection, deck, day cutoff, fail policy) the log was built for
+        self.last_revlog_id = 0 # Highest revlog id folded into the log
+        self.loading = False # A background load_history is pending
+
         # State-based detection tracking
         self.last_card_id = None
         self.was_answered = False
         self.last_action_handled = False
         self.last_handled_card_id = None
 
-# Singleton instance
+    def stash_log(self):
+        """Detaches the current log (and its undo journal) as a LogState."""
+        return LogState(self.history, self.status_log, self.time_log, self.time_prefix, self.chunks,
+                        self.history_key, self.last_revlog_id)
+
+    def adopt_log(self, log):
+        """Makes a stashed LogState the current log."""
+        self.history = log.history
+        self.status_log = log.status_log
+        self.time_log = log.time_log
+        self.time_prefix = log.time_prefix
+        self.chunks = log.chunks
+        self.current_count = len(log.status_log)
+        self.history_key = log.history_key
+        self.last_revlog_id = log.last_revlog_id
+
+    def reset_log(self):
+        """Clears the review log and its undo journal (before a rebuild)."""
+        self.history = []
+        self.status_log = array("b")
+        self.time_log = array("d")
+        self.time_prefix = prefix_sums(())
+        self.chunks = ChunkAggregates(self.chunks.chunk_size)
+        self.current_count = 0
+
+    def restore_log(self, status_log, time_log):
+        """Replaces the log with saved arrays; each entry can be reverted by standard undo."""
+        self.history = [_APPEND_ENTRY] * len(status_log)
+        self.status_log = encode_status_log(status_log)
+        self.time_log = encode_time_log(time_log)
+        self.time_prefix = prefix_sums(self.time_log)
+        self.chunks = ChunkAggregates.from_log(self.chunks.chunk_size, self.status_log)
+        self.current_count = len(self.status_log)
+
+    def set_chunk_size(self, chunk_size):
+        """Re-indexes the log if the configured chunk size changed. O(N) only on change."""
+        if chunk_size != self.chunks.chunk_size:
+            self.chunks = ChunkAggregates.from_log(chunk_size, self.status_log)
+
+    def append_review(self, status, elapsed):
+        """Appends one review (a STATUS_* code). O(1); standard undo can revert it."""
+        self.history.append(_APPEND_ENTRY)
+        self.chunks.add(len(self.status_log), status)
+        self.current_count += 1
+        self.status_log.append(status)
+        self.time_log.append(elapsed)
+        self.time_prefix.append(self.time_prefix[-1] + elapsed)
+
+    def mark_last_undone(self):
+        """Acknowledge undo: greys out the last review without reverting the count. O(1)."""
+        if not self.status_log:
+            return
+        has_time = len(self.time_log) == len(self.status_log)
+        prev_time = self.time_log[-1] if has_time else None
+        self.history.append((JOURNAL_UNDONE, self.status_log[-1], prev_time))
+        self.chunks.replace(len(self.status_log) - 1, self.status_log[-1], STATUS_UNDONE)
+
+        self.status_log[-1] = STATUS_UNDONE
+        if has_time:
+            self.time_log[-1] = 0
+            # Only the last running total depends on the zeroed entry
+            self.time_prefix[-1] = self.time_prefix[-2]
+
+    def revert_last(self):
+        """Standard undo: drops the most recent review. Amortised O(1).
+
+        "undone" marks are not undo points of their own, they are unwound
+        together with the review they were applied to.
+        """
+        while self.history:
+            entry = self.history.pop()
+            if entry[0] == JOURNAL_APPEND:
+                index = len(self.status_log) - 1
+                self.chunks.remove(index, self.status_log[index])
+                self.current_count -= 1
+                self.status_log.pop()
+                self.time_log.pop()
+                self.time_prefix.pop()
+                return True
+            # JOURNAL_UNDONE: restore the entry it overwrote
+            _, prev_status, prev_time = entry
+            self.chunks.replace(len(self.status_log) - 1, self.status_log[-1], prev_status)
+            self.status_log[-1] = prev_status
+            if prev_time is not None:
+                self.time_log[-1] = prev_time
+                self.time_prefix[-1] = self.time_prefix[-2] + prev_time
+        return False
+
+class LogState:
+    """The per-deck part of SessionState, kept aside while another deck is studied."""
+    __slots__ = ("history", "status_log", "time_log", "time_prefix", "chunks", "history_key", "last_revlog_id")
+
+    def __init__(self, history, status_log, time_log, time_prefix, chunks, history_key, last_revlog_id):
+        self.history = history
+        self.status_log = status_log
+        self.time_log = time_log
+        self.time_prefix = time_prefix
+        self.chunks = chunks
+        self.history_key = history_key
+        self.last_revlog_id = last_revlog_id
+
+    def nbytes(self):
+        """Approximate memory held by the log (array buffers + journal slots)."""
+        chunks = self.chunks
+        total = 0
+        for arr in (self.status_log, self.time_log, self.time_prefix, chunks.counts, chunks.sizes):
+            total += len(arr) * arr.itemsize
+        # Journal entries are mostly the shared append tuple; count one pointer each
+        return total + len(self.history) * 8
+
+class LogCache:
+    """Bounded LRU of LogStates keyed by (deck id, day cutoff).
+    
+    Evicts the least recently used decks once either the entry or the byte
+    budget is exceeded.
+    """
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict() # (did, cutoff_ms) -> (LogState, nbytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def put(self, key, log):
+        self.pop(key)
+        size = log.nbytes()
+        if size > self.max_bytes:
+            return # Would evict everything else and still not fit
+        self._entries[key] = (log, size)
+        self.nbytes += size
+        while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+            _, (_, old_size) = self._entries.popitem(last=False)
+            self.nbytes -= old_size
+
+    def pop(self, key):
+        """Removes and returns the LogState for key, or None."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.nbytes -= entry[1]
+        return entry[0]
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+# Singleton instances
 session = SessionState()
+log_cache = LogCache(max_entries=8, max_bytes=4 * 1024 * 1024)
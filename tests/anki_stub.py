@@ -0,0 +1,75 @@
+"""Minimal stand-in for Anki's aqt, shared by the tests and benchmarks/bench_render.py.
+
+aqt.qt re-exports PyQt6 (offscreen platform), aqt.mw serves config.json through
+a fake add-on manager. The add-on is imported as package PACKAGE without
+running its __init__.py, so no Anki hooks are registered.
+"""
+import json
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "bpb_addon" # Import name of the add-on package
+
+
+class AddonManager:
+    def __init__(self):
+        with open(os.path.join(ROOT, "config.json"), encoding="utf-8") as f:
+            self.config = json.load(f)
+
+    def getConfig(self, name):
+        return json.loads(json.dumps(self.config))
+
+    def writeConfig(self, name, config):
+        self.config = json.loads(json.dumps(config))
+
+    def setConfigUpdatedAction(self, name, action):
+        pass
+
+    def addonFromModule(self, module):
+        return module.split(".")[0]
+
+    def addonsFolder(self, addon=None):
+        return os.path.dirname(ROOT)
+
+
+class MainWindow:
+    state = "review"
+    col = None
+
+    def __init__(self):
+        self.addonManager = AddonManager()
+
+    def isVisible(self):
+        return False # Keeps the shared live ticker idle
+
+    def isMinimized(self):
+        return False
+
+    def installEventFilter(self, obj):
+        pass
+
+
+def install_stubs():
+    """Installs the aqt stub and the add-on package once; returns the QApplication."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6 import QtCore, QtGui, QtWidgets
+
+    if PACKAGE not in sys.modules:
+        qt = types.ModuleType("aqt.qt")
+        for module in (QtCore, QtGui, QtWidgets):
+            qt.__dict__.update({k: v for k, v in vars(module).items() if not k.startswith("_")})
+        utils = types.ModuleType("aqt.utils")
+        utils.tooltip = lambda *args, **kwargs: None
+        aqt = types.ModuleType("aqt")
+        aqt.__path__ = []
+        aqt.qt = qt
+        aqt.utils = utils
+        aqt.mw = MainWindow()
+        sys.modules.update({"aqt": aqt, "aqt.qt": qt, "aqt.utils": utils})
+
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [ROOT]
+        sys.modules[PACKAGE] = package
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
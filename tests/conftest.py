@@ -0,0 +1,25 @@
+import importlib
+import sys
+
+import pytest
+
+import anki_stub
+
+_app = None
+
+
+@pytest.fixture(scope="session")
+def addon():
+    """Imports an add-on module by name, e.g. addon("render_config")."""
+    global _app
+    if _app is None:
+        _app = anki_stub.install_stubs()
+    return lambda name: importlib.import_module(anki_stub.PACKAGE + "." + name)
+
+
+@pytest.fixture
+def mw(addon):
+    """Stub main window with a fresh copy of config.json as the stored config."""
+    mw = sys.modules["aqt"].mw
+    mw.addonManager = anki_stub.AddonManager()
+    return mw
@@ -0,0 +1,74 @@
+import json
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_defaults():
+    with open(os.path.join(ROOT, "config.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_defaults_are_normalised(addon):
+    cs = addon("config_schema")
+    defaults = load_defaults()
+    assert cs.normalize_config(defaults) == defaults
+
+
+def test_version_0_is_migrated(addon):
+    cs = addon("config_schema")
+    old = load_defaults()
+    del old[cs.VERSION_KEY]
+    old["fail_policy"] = "count"
+    old["visual_options"]["perfect_color"] = old["colors"].pop("perfect_color")
+    old["chunk_evaluation"]["intervals"] = [{"color_key": "again", "end_val": 0.5}]
+
+    config = cs.normalize_config(old)
+    assert config[cs.VERSION_KEY] == cs.SCHEMA_VERSION
+    assert config["fail_policy"] == "acknowledge"
+    assert "perfect_color" not in config["visual_options"]
+    assert config["colors"]["perfect_color"] == "#FF3388"
+    assert config["chunk_evaluation"]["intervals"] == [{
+        "enabled": True,
+        "start_bracket": "[",
+        "start_val": 0.0,
+        "end_bracket": ")",
+        "end_val": 0.5,
+        "color_key": "again",
+        "pattern_key": None,
+    }]
+    assert cs.normalize_config(config) == config
+
+
+def test_settings_dialog_writes_current_schema(addon, mw):
+    cs = addon("config_schema")
+    settings = addon("settings")
+    dialog = settings.SettingsDialog(None, cs.load_config())
+    dialog.update_config_from_ui()
+
+    # The dialog is a writer too, it must not bring back the version 0 layout
+    assert "perfect_color" not in dialog.config["visual_options"]
+    config = cs.normalize_config(dialog.config)
+    assert "perfect_color" not in config["visual_options"]
+    assert config["colors"]["perfect_color"] == "#FF3388"
+
+    dialog.accept()
+    assert mw.addonManager.config == config
+
+
+def test_invalid_numbers_fall_back(addon):
+    cs = addon("config_schema")
+    defaults = load_defaults()
+    config = cs.normalize_config({
+        "chunk_size": "ten",
+        "chunk_evaluation": {
+            "weights": {"again": "x", "hard": None, "good": "0.5", "easy": [1]},
+            "intervals": [{"start_val": "x", "end_val": {}}],
+        },
+    })
+    assert config["chunk_size"] == defaults["chunk_size"]
+    weights = config["chunk_evaluation"]["weights"]
+    def_weights = defaults["chunk_evaluation"]["weights"]
+    assert weights == {"again": def_weights["again"], "hard": def_weights["hard"], "good": 0.5, "easy": def_weights["easy"]}
+    interval = config["chunk_evaluation"]["intervals"][0]
+    assert (interval["start_val"], interval["end_val"]) == (0.0, 1.0)
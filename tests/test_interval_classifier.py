@@ -0,0 +1,83 @@
+import math
+import random
+
+# IntervalClassifier must give exactly what the original linear scan gives,
+# for any interval set and any score (see render_config.compile_classifier).
+
+COLORS = {"again": "again", "hard": "hard", "good": "good", "easy": "easy"}
+KEYS = (None, "again", "hard", "good", "easy")
+
+
+def make_interval(rc, iv):
+    return rc.Interval(
+        start=iv["start_val"],
+        end=iv["end_val"],
+        start_closed=iv["start_bracket"] == "[",
+        end_closed=iv["end_bracket"] == "]",
+        color_key=iv["color_key"],
+        pattern_key=iv["pattern_key"],
+    )
+
+
+def random_intervals(r):
+    """Independent intervals: gaps, overlaps, empty and reversed ranges, shared edges."""
+    grid = [round(r.uniform(-0.5, 1.5), r.choice((1, 2, 3, 6))) for _ in range(r.randint(1, 6))]
+    intervals = []
+    for _ in range(r.randint(0, 8)):
+        start = r.choice(grid)
+        intervals.append({
+            "start_val": start,
+            "end_val": r.choice(grid + [start]),
+            "start_bracket": r.choice("[("),
+            "end_bracket": r.choice(")]"),
+            "color_key": r.choice(KEYS[1:]),
+            "pattern_key": r.choice(KEYS),
+        })
+    if r.random() < 0.5:
+        intervals.sort(key=lambda iv: iv["start_val"]) # Usual config order
+    return intervals
+
+
+def fsrs_intervals(fsrs_logic, r):
+    _, intervals = fsrs_logic.calculate_fsrs_intervals(r.randint(1, 50), r.uniform(0.7, 0.99))
+    return [iv for iv in intervals if iv["enabled"]]
+
+
+def scores(r, intervals):
+    """Random scores plus every boundary and its neighbouring floats."""
+    values = [r.uniform(-1, 2) for _ in range(50)]
+    for iv in intervals:
+        for edge in (iv.start, iv.end):
+            for shift in (0.0, -1e-9, 1e-9):
+                x = edge + shift
+                values += [x, math.nextafter(x, -math.inf), math.nextafter(x, math.inf)]
+    return values
+
+
+def check(rc, intervals, r):
+    intervals = tuple(make_interval(rc, iv) for iv in intervals)
+    classifier = rc.compile_classifier(intervals, COLORS)
+    for avg in scores(r, intervals):
+        assert classifier.classify(avg) == rc.scan_intervals(intervals, COLORS, avg), (intervals, avg)
+
+
+def test_random_interval_sets(addon):
+    rc = addon("render_config")
+    r = random.Random(6)
+    for _ in range(2000):
+        check(rc, random_intervals(r), r)
+
+
+def test_fsrs_interval_sets(addon):
+    rc = addon("render_config")
+    fsrs_logic = addon("fsrs_logic")
+    r = random.Random(60)
+    for _ in range(1000):
+        check(rc, fsrs_intervals(fsrs_logic, r), r)
+
+
+def test_default_intervals(addon):
+    rc = addon("render_config")
+    config_utils = addon("config_utils")
+    intervals = [iv for iv in config_utils.get_defaults()["chunk_evaluation"]["intervals"] if iv["enabled"]]
+    check(rc, intervals, random.Random(0))
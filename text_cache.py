@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from aqt.qt import QPainterPath
+
+# Prepared labels for ProgressBarWidget.draw_styled_text.
+# Numbers, percentages and timers repeat from paint to paint, so each label is
+# measured and shaped into a glyph path once instead of on every paint.
+#
+# Paths are built once at the origin and translated to the label position, so
+# one entry serves every position. Qt places glyphs in fixed point, so a moved
+# path can differ from addText at the final position in antialiased edge
+# pixels, but not in shape or placement. Paths are in logical pixels, so one
+# entry serves every device pixel ratio; outline pen and fill brush are
+# applied at draw time.
+
+MAX_TEXT_ENTRIES = 512
+
+
+class LRU:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+class TextCache:
+    """Label widths and glyph paths keyed by (text, QFont.key())."""
+
+    def __init__(self, max_entries):
+        self.widths = LRU(max_entries)
+        self.paths = LRU(max_entries)
+
+    def width(self, text, font, metrics):
+        """metrics.horizontalAdvance(text), measured once per font."""
+        key = (text, font.key())
+        width = self.widths.get(key)
+        if width is None:
+            width = metrics.horizontalAdvance(text)
+            self.widths.put(key, width)
+        return width
+
+    def path(self, text, font, x, y):
+        """Glyph path of text with its baseline origin at (x, y)."""
+        key = (text, font.key())
+        path = self.paths.get(key)
+        if path is None:
+            path = QPainterPath()
+            path.addText(0, 0, font, text)
+            self.paths.put(key, path)
+        return path.translated(x, y)
+
+    def clear(self):
+        self.widths.clear()
+        self.paths.clear()
+
+
+text_cache = TextCache(MAX_TEXT_ENTRIES)